@@ -1,8 +1,67 @@
 import re
+import enum
+import time
+import queue
+import random
+import threading
+import atexit
+import weakref
 import logging
+import logging.handlers
+import collections
+import concurrent.futures
 
-# Set up logging for error reporting
-logging.basicConfig(filename='mrz_errors.log', level=logging.ERROR, format='%(asctime)s %(message)s')
+# Logger for error reporting; nothing is written until configure_logging is called
+logger = logging.getLogger("MRTD")
+logger.addHandler(logging.NullHandler())
+_listener = None
+_queue_handler = None
+
+def configure_logging(filename='mrz_errors.log', level=logging.ERROR):
+    """
+    Route MRZ error logging through a queue so that the file is written on a
+    background thread instead of inside the decode path.
+    Returns the running QueueListener; call stop_logging to flush and stop it.
+    """
+    global _listener, _queue_handler
+    stop_logging()
+    file_handler = logging.FileHandler(filename)
+    file_handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+    log_queue = queue.SimpleQueue()
+    _queue_handler = logging.handlers.QueueHandler(log_queue)
+    _listener = logging.handlers.QueueListener(log_queue, file_handler)
+    logger.addHandler(_queue_handler)
+    logger.setLevel(level)
+    _listener.start()
+    return _listener
+
+def stop_logging():
+    """
+    Flush pending log records and stop the background listener, if any.
+    """
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    logger.removeHandler(_queue_handler)
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = _queue_handler = None
+
+atexit.register(stop_logging)
+
+# Live ErrorAggregators, held weakly so that dropped ones can be collected
+_aggregators = weakref.WeakSet()
+
+def _flush_aggregators():
+    """
+    Log the pending summary of every live aggregator.
+    """
+    for aggregator in list(_aggregators):
+        aggregator.flush()
+
+# Registered after stop_logging, so it runs first
+atexit.register(_flush_aggregators)
 
 # Define Damm table for checksum calculation
 DAMM_TABLE = [
@@ -18,11 +77,424 @@ DAMM_TABLE = [
     [2, 5, 8, 1, 4, 3, 6, 7, 9, 0]
 ]
 
+class _DigitFilter(dict):
+    """
+    str.translate table that keeps decimal digits and deletes everything else.
+    Characters are classified on first sight and cached in the dict.
+    """
+    def __missing__(self, code):
+        char = chr(code)
+        self[code] = str(int(char)) if char.isdecimal() else None
+        return self[code]
+
+DIGITS = '0123456789'
+DIGITS_ONLY = _DigitFilter((code, chr(code)) for code in range(ord('0'), ord('9') + 1))
+
+def _build_damm_chunks(max_width=3):
+    """
+    Precompute multi-digit Damm transitions: the returned dict maps a chunk of
+    one to max_width digits to a tuple of the interim state reached from each
+    starting state, so DAMM_CHUNKS[chunk][state] consumes the whole chunk.
+    """
+    chunks = {'': tuple(range(10))}
+    previous = ['']
+    for _ in range(max_width):
+        current = []
+        for prefix in previous:
+            for digit in range(10):
+                chunk = prefix + DIGITS[digit]
+                chunks[chunk] = tuple(DAMM_TABLE[state][digit] for state in chunks[prefix])
+                current.append(chunk)
+        previous = current
+    del chunks['']
+    return chunks
+
+DAMM_CHUNKS = _build_damm_chunks()
+
+def damm_state(field, state=0):
+    """
+    Run Damm's algorithm over a field starting from the given interim state,
+    ignoring non-digit characters, and return the final interim state.
+    """
+    digits = field.translate(DIGITS_ONLY)
+    for start in range(0, len(digits), 3):
+        state = DAMM_CHUNKS[digits[start:start + 3]][state]
+    return state
+
+def _damm_state_pair(field, first, second):
+    """
+    Run Damm's algorithm over a field from two interim states at once,
+    sharing the digit filtering and chunk lookups between both walks.
+    """
+    digits = field.translate(DIGITS_ONLY)
+    for start in range(0, len(digits), 3):
+        transition = DAMM_CHUNKS[digits[start:start + 3]]
+        first = transition[first]
+        second = transition[second]
+    return first, second
+
+def line2_check_digits(passport_number, birth_date, expiration_date, personal_number):
+    """
+    Calculate the passport number, birth date, expiration date and composite
+    check digits of line 2 in a single left-to-right pass. The composite
+    state is carried from field to field instead of concatenating the fields
+    and scanning them again.
+    """
+    # The composite state after the passport number equals its check digit
+    passport = composite = damm_state(passport_number)
+    birth, composite = _damm_state_pair(birth_date, 0, composite)
+    expiration, composite = _damm_state_pair(expiration_date, 0, composite)
+    composite = damm_state(personal_number, composite)
+    return DIGITS[passport], DIGITS[birth], DIGITS[expiration], DIGITS[composite]
+
+# Length of a TD3 MRZ line
+LINE_LENGTH = 44
+
+class MRZError(str, enum.Enum):
+    """
+    Error codes reported when MRZ data cannot be decoded.
+    """
+    MISSING_DATA = "missing_data"
+    INVALID_FORMAT = "invalid_format"
+    UNEXPECTED = "unexpected_error"
+    PASSPORT_NUMBER = "passport_number"
+    BIRTH_DATE = "birth_date"
+    EXPIRATION_DATE = "expiration_date"
+    PERSONAL_NUMBER = "personal_number"
+
+    @property
+    def message(self):
+        """
+        The message returned by decode_mrz for this error.
+        """
+        return ERROR_MESSAGES[self]
+
+# Messages returned by decode_mrz for each error code
+ERROR_MESSAGES = {
+    MRZError.MISSING_DATA: "Error: MRZ data is missing.",
+    MRZError.INVALID_FORMAT: "Error: Invalid MRZ data format.",
+    MRZError.UNEXPECTED: "Error: An unexpected error occurred.",
+    MRZError.PASSPORT_NUMBER: "Check digit validation failed for passport number.",
+    MRZError.BIRTH_DATE: "Check digit validation failed for birth date.",
+    MRZError.EXPIRATION_DATE: "Check digit validation failed for expiration date.",
+    MRZError.PERSONAL_NUMBER: "Check digit validation failed for personal number.",
+}
+
+# Keys of the dict returned by decode_mrz, in DecodedMRZ field order
+FIELD_NAMES = ("Document Type", "Issuing Country", "Name", "Passport Number", "Nationality",
+               "Date of Birth", "Gender", "Expiration Date", "Personal Number")
+
+class DecodedMRZ(collections.namedtuple("DecodedMRZ", [
+        "document_type", "issuing_country", "name", "passport_number", "nationality",
+        "birth_date", "gender", "expiration_date", "personal_number"])):
+    """
+    Compact decoded MRZ record, a lighter alternative to the decode_mrz dict.
+    """
+    __slots__ = ()
+
+    def as_dict(self):
+        """
+        Return the record as the dict produced by decode_mrz.
+        """
+        return dict(zip(FIELD_NAMES, self))
+
+class MRZFormat:
+    """
+    MRZ document layout compiled once into slice tuples and a check digit plan.
+
+    fields maps each DecodedMRZ field to a (line, start, stop) slice (stop may
+    be None for the open-ended name field). checks lists (field name, error,
+    (line, start, stop), (line, position)) for every field check digit, and
+    composite is (field name, error, segments, (line, position)) for the
+    final check digit over a sequence of (line, start, stop) segments.
+    """
+    def __init__(self, name, line_lengths, fields, checks, composite):
+        self.name = name
+        self.line_count = len(line_lengths)
+        self.line_lengths = line_lengths
+        self.field_slices = tuple((line, slice(start, stop))
+                                  for line, start, stop in (fields[field] for field in DecodedMRZ._fields))
+
+        # Check digits are reported in plan order: field checks, then composite
+        self.errors = tuple((field_name, error, line + 1) for field_name, error, _, (line, _) in checks)
+        self.errors += ((composite[0], composite[1], composite[3][0] + 1),)
+        self.check_positions = tuple(position for _, _, _, position in checks) + (composite[3],)
+
+        # Positions that may only hold digits or the '<' filler: dates and check digits
+        self.numeric_positions = frozenset(
+            [(fields[field][0], position) for field in ("birth_date", "expiration_date")
+             for position in range(fields[field][1], fields[field][2])] + list(self.check_positions))
+
+        # Single-pass plan: walk the composite segments in order, carrying the
+        # composite state, and advance a field's own state alongside when the
+        # segment is also a checked field; other checked fields run on their own
+        steps = []
+        segments = [tuple(segment) for segment in composite[2]]
+        for index, (_, _, segment, _) in enumerate(checks):
+            if tuple(segment) not in segments:
+                steps.append((segment[0], slice(segment[1], segment[2]), index, False))
+        for segment in segments:
+            index = next((index for index, (_, _, field, _) in enumerate(checks) if tuple(field) == segment), None)
+            steps.append((segment[0], slice(segment[1], segment[2]), index, True))
+        self.check_steps = tuple(steps)
+
+        # Character-level plan for validate-only checks: the positions of each
+        # step and where its own check digit sits (None for plain segments)
+        self.validate_steps = tuple(
+            (line, tuple(range(segment.start, segment.stop)), index, in_composite,
+             None if index is None else self.check_positions[index])
+            for line, segment, index, in_composite in steps)
+
+    def matches(self, lines):
+        """
+        Return True if the line count and lengths fit this layout.
+        """
+        return (len(lines) == self.line_count and
+                all(len(line) in lengths for line, lengths in zip(lines, self.line_lengths)))
+
+# Registry of known layouts, tried in order by detect_format
+FORMATS = {}
+
+def register_format(name, line_lengths, fields, checks, composite):
+    """
+    Compile a layout and add it to the format registry.
+    """
+    FORMATS[name] = MRZFormat(name, line_lengths, fields, checks, composite)
+    return FORMATS[name]
+
+# TD3 passports as encoded by MRZProcessor: the composite check digit follows
+# the 14-character personal number, so line 2 is 43 (or padded to 44) long
+TD3 = register_format("TD3", ({44}, {43, 44}), {
+    "document_type": (0, 0, 2), "issuing_country": (0, 2, 5), "name": (0, 5, None),
+    "passport_number": (1, 0, 9), "nationality": (1, 10, 13), "birth_date": (1, 13, 19),
+    "gender": (1, 20, 21), "expiration_date": (1, 21, 27), "personal_number": (1, 28, 42),
+}, [
+    ("passport number", MRZError.PASSPORT_NUMBER, (1, 0, 9), (1, 9)),
+    ("birth date", MRZError.BIRTH_DATE, (1, 13, 19), (1, 19)),
+    ("expiration date", MRZError.EXPIRATION_DATE, (1, 21, 27), (1, 27)),
+], ("personal number", MRZError.PERSONAL_NUMBER, [(1, 0, 9), (1, 13, 19), (1, 21, 27), (1, 28, 42)], (1, 42)))
+
+# TD2 identity documents: two 36-character lines
+TD2 = register_format("TD2", ({36}, {36}), {
+    "document_type": (0, 0, 2), "issuing_country": (0, 2, 5), "name": (0, 5, None),
+    "passport_number": (1, 0, 9), "nationality": (1, 10, 13), "birth_date": (1, 13, 19),
+    "gender": (1, 20, 21), "expiration_date": (1, 21, 27), "personal_number": (1, 28, 35),
+}, [
+    ("document number", MRZError.PASSPORT_NUMBER, (1, 0, 9), (1, 9)),
+    ("birth date", MRZError.BIRTH_DATE, (1, 13, 19), (1, 19)),
+    ("expiration date", MRZError.EXPIRATION_DATE, (1, 21, 27), (1, 27)),
+], ("composite", MRZError.PERSONAL_NUMBER, [(1, 0, 9), (1, 13, 19), (1, 21, 27), (1, 28, 35)], (1, 35)))
+
+# TD1 identity cards: three 30-character lines, name on line 3
+TD1 = register_format("TD1", ({30}, {30}, {30}), {
+    "document_type": (0, 0, 2), "issuing_country": (0, 2, 5), "name": (2, 0, None),
+    "passport_number": (0, 5, 14), "nationality": (1, 15, 18), "birth_date": (1, 0, 6),
+    "gender": (1, 7, 8), "expiration_date": (1, 8, 14), "personal_number": (0, 15, 30),
+}, [
+    ("document number", MRZError.PASSPORT_NUMBER, (0, 5, 14), (0, 14)),
+    ("birth date", MRZError.BIRTH_DATE, (1, 0, 6), (1, 6)),
+    ("expiration date", MRZError.EXPIRATION_DATE, (1, 8, 14), (1, 14)),
+], ("composite", MRZError.PERSONAL_NUMBER,
+    [(0, 5, 14), (0, 15, 30), (1, 0, 6), (1, 8, 14), (1, 18, 29)], (1, 29)))
+
+def detect_format(lines):
+    """
+    Return the registered layout matching the line count and lengths, or None.
+    """
+    for layout in FORMATS.values():
+        if layout.matches(lines):
+            return layout
+    return None
+
+def slice_fields(lines, layout):
+    """
+    Slice the raw DecodedMRZ fields out of the MRZ lines using a compiled layout.
+    The name field is returned unnormalized.
+    """
+    return [lines[line][field] for line, field in layout.field_slices]
+
+def run_check_plan(lines, layout):
+    """
+    Calculate every check digit of a layout in a single pass over its
+    compiled plan, carrying the composite Damm state from segment to segment.
+    Returns the digits as a string in the order of layout.check_positions.
+    """
+    chunks = DAMM_CHUNKS
+    states = [0] * len(layout.errors)
+    composite = 0
+    for line, segment, index, in_composite in layout.check_steps:
+        digits = lines[line][segment].translate(DIGITS_ONLY)
+        if not in_composite:
+            state = 0
+            for start in range(0, len(digits), 3):
+                state = chunks[digits[start:start + 3]][state]
+            states[index] = state
+        elif index is None:
+            for start in range(0, len(digits), 3):
+                composite = chunks[digits[start:start + 3]][composite]
+        else:
+            # The field's own state and the composite state share each lookup
+            state = 0
+            for start in range(0, len(digits), 3):
+                transition = chunks[digits[start:start + 3]]
+                state = transition[state]
+                composite = transition[composite]
+            states[index] = state
+    states[-1] = composite
+    return ''.join([DIGITS[state] for state in states])
+
+# Characters allowed in an MRZ line and the value of each digit character
+MRZ_CHARACTERS = re.compile(r'[A-Z0-9<]*')
+DIGIT_VALUES = {DIGITS[digit]: digit for digit in range(10)}
+
+def validate_lines(lines, layout):
+    """
+    Validate-only fast path: check line lengths, the character set and every
+    check digit of a layout character by character, returning at the first
+    failure. No fields are sliced out. Returns True or an MRZError.
+    """
+    if len(lines) < layout.line_count or not all(lines):
+        return MRZError.MISSING_DATA
+    if not layout.matches(lines):
+        return MRZError.INVALID_FORMAT
+    for line in lines:
+        if MRZ_CHARACTERS.fullmatch(line) is None:
+            return MRZError.INVALID_FORMAT
+
+    value = DIGIT_VALUES.get
+    table = DAMM_TABLE
+    errors = layout.errors
+    composite = 0
+    for line_index, positions, index, in_composite, check in layout.validate_steps:
+        line = lines[line_index]
+        state = 0
+        for position in positions:
+            digit = value(line[position])
+            if digit is not None:
+                if in_composite:
+                    composite = table[composite][digit]
+                if index is not None:
+                    state = table[state][digit]
+        if index is not None and DIGITS[state] != lines[check[0]][check[1]]:
+            return errors[index][1]
+    line_index, position = layout.check_positions[-1]
+    if DIGITS[composite] != lines[line_index][position]:
+        return errors[-1][1]
+    return True
+
+def normalize_name(name_field):
+    """
+    Turn a '<'-separated MRZ name field into space-separated words.
+    """
+    name = name_field.rstrip('<').replace('<<', ' ').replace('<', ' ')
+    return ' '.join(name.split())  # Remove extra spaces
+
+class ErrorAggregator:
+    """
+    Count decode failures by error type and keep a bounded reservoir sample
+    of offending records, logging a periodic summary instead of one line per
+    failure. Safe to share between threads. Failures still pending at
+    interpreter exit are flushed then, unless close() was called first.
+    Only live aggregators are flushed at exit: close one (or use it as a
+    context manager) before dropping it, or its pending failures are lost.
+    """
+    def __init__(self, sample_size=20, flush_interval=60.0, seed=None):
+        self.sample_size = sample_size
+        self.flush_interval = flush_interval
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._reset()
+        _aggregators.add(self)
+
+    def _reset(self):
+        self.counts = collections.Counter()
+        self.samples = []
+        self.total = 0
+        self._last_flush = time.monotonic()
+
+    def record(self, error, line1, line2):
+        """
+        Count one failure and offer its record to the reservoir sample.
+        """
+        with self._lock:
+            self.total += 1
+            self.counts[error] += 1
+            # Reservoir sampling keeps every failure with equal probability
+            if len(self.samples) < self.sample_size:
+                self.samples.append((error, line1, line2))
+            else:
+                slot = self._random.randrange(self.total)
+                if slot < self.sample_size:
+                    self.samples[slot] = (error, line1, line2)
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def summary(self):
+        """
+        Return a snapshot of the failure counts and sampled records.
+        """
+        with self._lock:
+            return self._snapshot()
+
+    def _snapshot(self):
+        return {
+            "total": self.total,
+            "counts": {error.value: count for error, count in self.counts.items()},
+            "samples": [(error.value, line1, line2) for error, line1, line2 in self.samples],
+        }
+
+    def flush(self):
+        """
+        Log a summary of the failures seen since the last flush and reset.
+        Returns the summary that was logged.
+        """
+        with self._lock:
+            summary = self._snapshot()
+            self._reset()
+        if summary["total"]:
+            logger.error("%d MRZ decode failures: %s; %d sampled records: %s",
+                         summary["total"],
+                         ", ".join(f"{error}={count}" for error, count in sorted(summary["counts"].items())),
+                         len(summary["samples"]), summary["samples"])
+        return summary
+
+    def close(self):
+        """
+        Flush the pending summary and drop the exit-time flush.
+        Returns the summary that was logged.
+        """
+        _aggregators.discard(self)
+        return self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
 class MRZProcessor:
-    def __init__(self):
+    # Decode and encode stages, looked up on the instance so that
+    # Instrumentation can replace them with timed wrappers
+    _slice_fields = staticmethod(slice_fields)
+    _normalize_name = staticmethod(normalize_name)
+    _check_digits = staticmethod(run_check_plan)
+    _encode_check_digits = staticmethod(line2_check_digits)
+
+    def __init__(self, log_errors=True, aggregator=None, store=None, instrumentation=None):
         # Initialize MRZ lines
         self.line1 = ""
         self.line2 = ""
+        # Per-record error logging can be turned off for batch runs
+        self.log_errors = log_errors
+        # Optional ErrorAggregator that replaces per-record logging with summaries
+        self.aggregator = aggregator
+        # Optional storage backend (see MRTDstore) behind the database methods
+        self.store = store
+        # Optional MRTDinstrument.Instrumentation; without it the stages run unwrapped
+        self.instrumentation = instrumentation
+        if instrumentation is not None:
+            instrumentation.attach(self)
 
     def scan_mrz(self, line1, line2):
         """
@@ -32,66 +504,135 @@ class MRZProcessor:
         self.line1 = line1
         self.line2 = line2
 
-    def decode_mrz(self):
+    def decode_mrz(self, as_record=False):
         """
         Decode MRZ data and validate check digits.
+        Returns a dict, or an error message string on failure. With
+        as_record=True returns a DecodedMRZ, or an MRZError on failure.
         """
-        if not (self.line1 and self.line2):
-            logging.error("MRZ data is missing.")
-            return "Error: MRZ data is missing."
+        return self.decode(self.line1, self.line2, as_record)
 
-        # Extract fields from MRZ lines
+    def decode(self, line1, line2, as_record=False):
+        """
+        Reentrant version of decode_mrz that takes the MRZ lines as arguments
+        instead of reading the scanned lines, so one processor can be shared
+        across threads.
+        """
+        record, error = self._decode(line1, line2)
+        if as_record:
+            return record if error is None else error
+        if error is not None:
+            return error.message
+        return record.as_dict()
+
+    def decode_many(self, line_pairs, as_record=False):
+        """
+        Lazily decode an iterable of (line1, line2) pairs.
+        Yields a (result, error) tuple per record: result is the decoded dict
+        (a DecodedMRZ with as_record=True) and error is None on success,
+        otherwise result is None and error is an MRZError.
+        """
+        decode = self._decode
+        if as_record:
+            for line1, line2 in line_pairs:
+                yield decode(line1, line2)
+        else:
+            for line1, line2 in line_pairs:
+                record, error = decode(line1, line2)
+                yield (None if record is None else record.as_dict()), error
+
+    def _decode(self, line1, line2):
+        """
+        Decode a single pair of TD3 MRZ lines without touching the scanned lines.
+        Returns a (DecodedMRZ, None) or (None, MRZError) tuple.
+        """
+        if not (line1 and line2):
+            return self._fail(MRZError.MISSING_DATA, line1, line2, "MRZ data is missing.")
+        return self._decode_layout((line1, line2), TD3)
+
+    def decode_lines(self, lines, as_record=False):
+        """
+        Decode a TD1 (three lines), TD2 or TD3 MRZ, detecting the format from
+        the line count and lengths. Returns the same results as decode.
+        """
+        lines = tuple(lines)
+        if len(lines) < 2 or not all(lines):
+            record, error = self._fail(MRZError.MISSING_DATA, *(lines + ("", ""))[:2], "MRZ data is missing.")
+        else:
+            layout = detect_format(lines)
+            if layout is None:
+                record, error = self._fail(MRZError.INVALID_FORMAT, *lines[:2], "Invalid MRZ data format.")
+            else:
+                record, error = self._decode_layout(lines, layout)
+        if as_record:
+            return record if error is None else error
+        return error.message if error is not None else record.as_dict()
+
+    def validate_mrz(self, line1, line2):
+        """
+        Check whether a TD3 MRZ is valid without decoding its fields.
+        Returns True, or the first MRZError found. Errors are non-empty
+        strings and therefore truthy, so test "validate_mrz(...) is True".
+        Failures are not logged.
+        """
+        return validate_lines((line1, line2), TD3)
+
+    def recover_mrz(self, line1, line2, max_substitutions=2, max_candidates=5, time_budget=0.05):
+        """
+        Suggest corrections for OCR confusions (O/0, I/1, B/8, S/5) that make
+        every check digit of a TD3 MRZ pass (see MRTDocr.recover_lines).
+        Returns a list of Correction tuples ranked by the number of
+        substitutions; a valid MRZ comes back unchanged with cost 0.
+        """
+        # Imported on first use, so that decoding does not load the OCR search
+        from MRTDocr import recover_lines
+        if not (line1 and line2):
+            return []
+        try:
+            return recover_lines((line1, line2), TD3, max_substitutions, max_candidates, time_budget)
+        except IndexError:
+            return []
+
+    def _decode_layout(self, lines, layout):
+        """
+        Generic decoder that runs over a compiled MRZFormat plan.
+        """
+        line1, line2 = lines[0], lines[1]
         try:
-            # Line 1 parsing
-            document_type = self.line1[0:2].replace('<', '')
-            issuing_country = self.line1[2:5]
-            name_field = self.line1[5:].rstrip('<')
-            name = name_field.replace('<<', ' ').replace('<', ' ')
-            name = ' '.join(name.split())  # Remove extra spaces
-
-            # Line 2 parsing
-            passport_number = self.line2[0:9]
-            passport_check_digit = self.line2[9]
-            nationality = self.line2[10:13]
-            birth_date = self.line2[13:19]
-            birth_check_digit = self.line2[19]
-            gender = self.line2[20]
-            expiration_date = self.line2[21:27]
-            expiration_check_digit = self.line2[27]
-            personal_number = self.line2[28:42].rstrip('<')
-            final_check_digit = self.line2[42]
-
-            # Validate check digits using Damm's algorithm
-            if not self.validate_check_digit(passport_number, passport_check_digit, "passport number", 2):
-                return "Check digit validation failed for passport number."
-            if not self.validate_check_digit(birth_date, birth_check_digit, "birth date", 2):
-                return "Check digit validation failed for birth date."
-            if not self.validate_check_digit(expiration_date, expiration_check_digit, "expiration date", 2):
-                return "Check digit validation failed for expiration date."
-
-            # Combine data for final check digit
-            combined_data = passport_number + birth_date + expiration_date + personal_number
-            if not self.validate_check_digit(combined_data, final_check_digit, "personal number", 2):
-                return "Check digit validation failed for personal number."
+            # Extract fields from MRZ lines
+            (document_type, issuing_country, name_field, document_number, nationality,
+             birth_date, gender, expiration_date, personal_number) = self._slice_fields(lines, layout)
+            name = self._normalize_name(name_field)
+
+            # Validate check digits using Damm's algorithm in a single pass
+            calculated = self._check_digits(lines, layout)
+            # Indexing the check digits raises IndexError for lines that are too short
+            expected = ''.join([lines[line][position] for line, position in layout.check_positions])
+            if calculated != expected:
+                for (field_name, error, line), calculated_digit, check_digit in zip(layout.errors, calculated,
+                                                                                       expected):
+                    if calculated_digit != check_digit:
+                        return self._fail(error, line1, line2, "Mismatch in %s field on line %s. Expected %s, got %s.",
+                                          field_name, line, calculated_digit, check_digit)
 
             # Return extracted and validated data
-            return {
-                "Document Type": document_type,
-                "Issuing Country": issuing_country,
-                "Name": name,
-                "Passport Number": passport_number.strip('<'),
-                "Nationality": nationality,
-                "Date of Birth": birth_date,
-                "Gender": gender,
-                "Expiration Date": expiration_date,
-                "Personal Number": personal_number,
-            }
+            return DecodedMRZ(document_type.replace('<', ''), issuing_country, name, document_number.strip('<'),
+                              nationality, birth_date, gender, expiration_date, personal_number.rstrip('<')), None
         except IndexError:
-            logging.error("Invalid MRZ data format.")
-            return "Error: Invalid MRZ data format."
+            return self._fail(MRZError.INVALID_FORMAT, line1, line2, "Invalid MRZ data format.")
         except Exception as e:
-            logging.error(f"An unexpected error occurred: {e}")
-            return "Error: An unexpected error occurred."
+            return self._fail(MRZError.UNEXPECTED, line1, line2, "An unexpected error occurred: %s", e)
+
+    def _fail(self, error, line1, line2, message, *args):
+        """
+        Report a decode failure, either to the error aggregator or as one log
+        line per record, and return the (None, error) result.
+        """
+        if self.aggregator is not None:
+            self.aggregator.record(error, line1, line2)
+        elif self.log_errors:
+            logger.error(message, *args)
+        return None, error
 
     def encode_mrz(self, data):
         """
@@ -112,10 +653,9 @@ class MRZProcessor:
         line1 = f"{document_type}<{issuing_country}{name:<39}".replace(" ", "<")
         line1 = line1[:44]  # Ensure line1 is 44 characters
 
-        # Calculate check digits using Damm's algorithm
-        passport_check_digit = self.calculate_check_digit(passport_number)
-        birth_check_digit = self.calculate_check_digit(birth_date)
-        expiration_check_digit = self.calculate_check_digit(expiration_date)
+        # Calculate all check digits using Damm's algorithm in a single pass
+        passport_check_digit, birth_check_digit, expiration_check_digit, final_check_digit = self._encode_check_digits(
+            passport_number, birth_date, expiration_date, personal_number)
 
         # Format the personal number to 14 characters, padding with '<'
         personal_number_formatted = personal_number.ljust(14, '<')
@@ -124,23 +664,36 @@ class MRZProcessor:
         line2_partial = f"{passport_number:<9}{passport_check_digit}{nationality}{birth_date}{birth_check_digit}{gender}{expiration_date}{expiration_check_digit}{personal_number_formatted}"
         line2_partial = line2_partial.replace(" ", "<")
 
-        # Calculate the final check digit for the combined data
-        combined_data = passport_number + birth_date + expiration_date + personal_number
-        final_check_digit = self.calculate_check_digit(combined_data)
-
         # Construct line2
         line2 = f"{line2_partial}{final_check_digit}"
         line2 = line2[:44]  # Ensure line2 is 44 characters
 
         return line1, line2
 
+    def encode(self, data):
+        """
+        Reentrant encoding of a data dict into (line1, line2); encode_mrz
+        keeps no instance state, so this is the same operation.
+        """
+        return self.encode_mrz(data)
+
+    def encode_many(self, records):
+        """
+        Lazily encode an iterable of data dicts into (line1, line2) pairs.
+        """
+        encode = self.encode_mrz
+        for data in records:
+            yield encode(data)
+
     def validate_check_digit(self, field, check_digit, field_name, line):
         """
         Validate the check digit using Damm's algorithm.
         """
-        calculated_digit = self.calculate_check_digit(field)
+        calculated_digit = DIGITS[damm_state(field)]
         if calculated_digit != check_digit:
-            logging.error(f"Mismatch in {field_name} field on line {line}. Expected {calculated_digit}, got {check_digit}.")
+            if self.log_errors:
+                logger.error("Mismatch in %s field on line %s. Expected %s, got %s.",
+                             field_name, line, calculated_digit, check_digit)
             return False
         return True
 
@@ -148,19 +701,15 @@ class MRZProcessor:
         """
         Calculate the check digit using Damm's algorithm.
         """
-        interim = 0
-        for char in field:
-            if char.isdigit():
-                num = int(char)
-                interim = DAMM_TABLE[interim][num]
-            else:
-                continue  # Ignore non-numeric characters
-        return str(interim)
+        return DIGITS[damm_state(field)]
 
     def retrieve_from_database(self, passport_number):
         """
-        Simulate retrieving data from a database using the passport number.
+        Retrieve data from the storage backend using the passport number.
+        Without a backend, simulate it by returning dummy data.
         """
+        if self.store is not None:
+            return self.store.retrieve(passport_number)
         # Since we don't have a database, return dummy data
         dummy_data = {
             "Document Type": "P",
@@ -177,10 +726,19 @@ class MRZProcessor:
 
     def write_to_database(self, data):
         """
-        Simulate writing data to a database.
+        Write data to the storage backend, or simulate it without one.
         """
-        # Since we don't have a database, simply pass
-        pass
+        if self.store is not None:
+            self.store.write(data)
+
+    def encode_from_database(self, passport_number):
+        """
+        Retrieve a record by passport number and encode it into (line1, line2).
+        Returns None if the storage backend has no such record.
+        """
+        if self.store is not None:
+            return self.store.retrieve_encoded(passport_number, self.encode_mrz)
+        return self.encode_mrz(self.retrieve_from_database(passport_number))
 
     def hardware_scan(self):
         """
@@ -190,8 +748,53 @@ class MRZProcessor:
         self.line1 = "P<UTODOE<<JOHN<QUINCY<<<<<<<<<<<<<<<<<<<<<<"
         self.line2 = "L898902C36UTO8001017M2501012<<<<<<<<<<<<<<08"
 
+class MRZService:
+    """
+    Thread-pool backed service that decodes and encodes concurrent
+    submissions on one shared MRZProcessor, returning futures.
+    """
+    def __init__(self, processor=None, max_workers=None):
+        self.processor = processor or MRZProcessor()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers,
+                                                               thread_name_prefix="mrz-service")
+
+    def submit_decode(self, line1, line2, as_record=False):
+        """
+        Schedule a decode and return a Future for its result.
+        """
+        return self._executor.submit(self.processor.decode, line1, line2, as_record)
+
+    def submit_encode(self, data):
+        """
+        Schedule an encode and return a Future for its (line1, line2) result.
+        """
+        return self._executor.submit(self.processor.encode, data)
+
+    def shutdown(self, wait=True):
+        """
+        Stop accepting submissions and optionally wait for pending ones.
+        """
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+def read_line_pairs(file):
+    """
+    Read consecutive (line1, line2) pairs from an open text file, ignoring
+    trailing blank padding. A trailing unpaired line is returned with an
+    empty line 2.
+    """
+    lines = (line.rstrip('\r\n ') for line in file)
+    for line1 in lines:
+        yield line1, next(lines, "")
+
 # Sample usage (excluded from coverage)
 if __name__ == "__main__":  # pragma: no cover
+    configure_logging()
     mrz_processor = MRZProcessor()
     # Simulate scanning MRZ lines
     mrz_processor.scan_mrz(
@@ -0,0 +1,84 @@
+from MRTD import DAMM_TABLE, LINE_LENGTH
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+# Line 2 fields covered by the composite check digit (passport number,
+# birth date, expiration date, personal number) and the columns of the
+# passport number, birth date, expiration date and composite check digits
+LINE2_COMPOSITE_SLICES = (slice(0, 9), slice(13, 19), slice(21, 27), slice(28, 42))
+LINE2_CHECK_COLUMNS = (9, 19, 27, 42)
+
+# Damm table as a flat uint8 NumPy array for the vectorized engine, indexed by
+# (state << 4) | digit; column 10 is the identity so that non-digit characters
+# leave the state unchanged
+DAMM_ARRAY = None
+if np is not None:
+    DAMM_ARRAY = np.zeros((10, 16), dtype=np.uint8)
+    DAMM_ARRAY[:, :10] = DAMM_TABLE
+    DAMM_ARRAY[:, 10] = np.arange(10)
+    DAMM_ARRAY = DAMM_ARRAY.ravel()
+
+def as_line_array(lines):
+    """
+    Convert a batch of fixed-width MRZ lines into an (N, 44) uint8 array.
+    Accepts an existing uint8 array (2-D arrays may have any width that
+    covers the check digit columns), or a sequence of str/bytes lines;
+    shorter lines are padded with '<' (encode_mrz produces 43 characters).
+    """
+    if np is None:
+        raise ImportError("NumPy is required for batch check digit calculation.")
+    if isinstance(lines, np.ndarray):
+        # 2-D arrays (e.g. strided views of a memory-mapped file) are used as is
+        array = lines if lines.ndim == 2 else lines.reshape(-1, LINE_LENGTH)
+        if array.shape[1] <= LINE2_CHECK_COLUMNS[-1]:
+            raise ValueError(f"MRZ line arrays need at least {LINE2_CHECK_COLUMNS[-1] + 1} columns.")
+        return array
+    else:
+        encoded = [(line.encode('ascii') if isinstance(line, str) else bytes(line)).ljust(LINE_LENGTH, b'<')
+                   for line in lines]
+        if any(len(line) != LINE_LENGTH for line in encoded):
+            raise ValueError(f"MRZ lines must be at most {LINE_LENGTH} characters long.")
+        return np.frombuffer(b''.join(encoded), dtype=np.uint8).reshape(-1, LINE_LENGTH)
+
+def _damm_columns(state, digits, columns):
+    """
+    Advance a vector of Damm states over a range of columns of a transposed
+    digit array, one column (all rows at once) per step.
+    """
+    for column in range(columns.start, columns.stop):
+        state = DAMM_ARRAY.take((state << 4) | digits[column])
+    return state
+
+def batch_check_digits(lines):
+    """
+    Calculate line 2 check digits for a whole batch of MRZ lines at once.
+    Returns an (N, 4) uint8 array holding the passport number, birth date,
+    expiration date and composite check digits of every row.
+    """
+    array = as_line_array(lines)
+    # Map non-digits to the identity column and lay columns out contiguously
+    digits = np.minimum(array - np.uint8(ord('0')), np.uint8(10))
+    digits = np.ascontiguousarray(digits.T)
+    result = np.empty((array.shape[0], 4), dtype=np.uint8)
+
+    # The composite state after the passport number equals its check digit
+    composite = _damm_columns(np.zeros(array.shape[0], dtype=np.uint8), digits, LINE2_COMPOSITE_SLICES[0])
+    result[:, 0] = composite
+    for index in (1, 2):
+        columns = LINE2_COMPOSITE_SLICES[index]
+        result[:, index] = _damm_columns(np.zeros_like(composite), digits, columns)
+        composite = _damm_columns(composite, digits, columns)
+    result[:, 3] = _damm_columns(composite, digits, LINE2_COMPOSITE_SLICES[3])
+    return result
+
+def batch_validate(lines):
+    """
+    Validate the check digits of a batch of MRZ line 2 values.
+    Returns a boolean array that is True where all four check digits match.
+    """
+    array = as_line_array(lines)
+    expected = array[:, LINE2_CHECK_COLUMNS] - np.uint8(ord('0'))
+    return (batch_check_digits(array) == expected).all(axis=1)
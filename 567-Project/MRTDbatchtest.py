@@ -0,0 +1,39 @@
+import unittest
+import MRTDbatch
+from MRTD import MRZProcessor
+
+@unittest.skipIf(MRTDbatch.np is None, "NumPy is not installed")
+class TestBatchCheckDigits(unittest.TestCase):
+    def setUp(self):
+        processor = MRZProcessor()
+        self.lines = [
+            processor.encode_mrz({"Passport Number": passport, "Date of Birth": birth, "Personal Number": personal})[1]
+            for passport, birth, personal in [("V855996J7", "720916", "MI797251T"),
+                                              ("L898902C3", "740812", "ZE184226B"),
+                                              ("123456789", "000000", "")]
+        ]
+
+    def test_batch_check_digits_matches_scalar(self):
+        """
+        Test that the vectorized engine returns the same digits as encode_mrz.
+        """
+        digits = MRTDbatch.batch_check_digits(self.lines)
+        for line, row in zip(self.lines, digits):
+            self.assertEqual(''.join(str(digit) for digit in row), line[9] + line[19] + line[27] + line[42])
+
+    def test_batch_validate(self):
+        """
+        Test that batch_validate flags rows with a wrong check digit.
+        """
+        lines = self.lines + [self.lines[0][:19] + '0' + self.lines[0][20:]]
+        self.assertEqual(MRTDbatch.batch_validate(lines).tolist(), [True, True, True, self.lines[0][19] == '0'])
+
+    def test_as_line_array_rejects_long_lines(self):
+        """
+        Test that lines longer than 44 characters are rejected.
+        """
+        with self.assertRaises(ValueError):
+            MRTDbatch.as_line_array(["<" * 45])
+
+if __name__ == '__main__':
+    unittest.main()
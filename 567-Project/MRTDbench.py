@@ -0,0 +1,196 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import concurrent.futures
+
+import MRTDgen
+from MRTD import MRZProcessor
+
+MODES = ("decode", "encode", "checksum", "batch", "parallel")
+
+def make_dataset(size, invalid_rate=0.1, seed=567):
+    """
+    Build size (data, line1, line2) records with MRTDgen, with invalid_rate
+    of them carrying a corrupted check digit or a missing line.
+    """
+    return [(data, line1, line2) for data, line1, line2, _ in
+            MRTDgen.generate(size, seed, invalid_rate, ("check_digit", "check_digit", "check_digit",
+                                                          "check_digit", "missing_line"))]
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def _result(records, elapsed, latencies_ns):
+    """
+    Summarize a timed run as throughput and p50/p99 latency in microseconds.
+    """
+    latencies_ns.sort()
+    return {
+        "records": records,
+        "seconds": elapsed,
+        "records_per_second": records / elapsed if elapsed else 0.0,
+        "p50_us": _percentile(latencies_ns, 0.50) / 1000,
+        "p99_us": _percentile(latencies_ns, 0.99) / 1000,
+    }
+
+def _time_each(function, items):
+    """
+    Call function on every item, timing each call.
+    """
+    latencies = []
+    clock = time.perf_counter_ns
+    start = clock()
+    for item in items:
+        before = clock()
+        function(item)
+        latencies.append(clock() - before)
+    return _result(len(latencies), (clock() - start) / 1e9, latencies)
+
+def _time_chunks(run_chunks, chunks):
+    """
+    Time a function that processes a list of chunks, reporting per-chunk
+    latency and overall record throughput.
+    """
+    clock = time.perf_counter_ns
+    start = clock()
+    latencies = run_chunks(chunks)
+    elapsed = (clock() - start) / 1e9
+    return _result(sum(len(chunk) for chunk in chunks), elapsed, latencies)
+
+def bench_decode(records, **options):
+    processor = MRZProcessor(log_errors=False)
+    return _time_each(lambda pair: processor.decode(*pair), [(line1, line2) for _, line1, line2 in records])
+
+def bench_encode(records, **options):
+    processor = MRZProcessor(log_errors=False)
+    return _time_each(processor.encode_mrz, [data for data, _, _ in records])
+
+def bench_checksum(records, **options):
+    processor = MRZProcessor(log_errors=False)
+    fields = [line2[0:9] + line2[13:19] + line2[21:27] + line2[28:42] for _, _, line2 in records]
+    return _time_each(processor.calculate_check_digit, fields)
+
+def bench_batch(records, chunk_size=1000, **options):
+    processor = MRZProcessor(log_errors=False)
+    pairs = [(line1, line2) for _, line1, line2 in records]
+    chunks = [pairs[start:start + chunk_size] for start in range(0, len(pairs), chunk_size)]
+
+    def run(chunks):
+        latencies = []
+        for chunk in chunks:
+            before = time.perf_counter_ns()
+            for _ in processor.decode_many(chunk, as_record=True):
+                pass
+            latencies.append(time.perf_counter_ns() - before)
+        return latencies
+    return _time_chunks(run, chunks)
+
+_worker_processor = MRZProcessor(log_errors=False)
+
+def _decode_chunk(pairs):
+    """
+    Decode a chunk of line pairs inside a worker process.
+    """
+    return len(list(_worker_processor.decode_many(pairs, as_record=True)))
+
+def bench_parallel(records, chunk_size=1000, workers=None, **options):
+    workers = workers or os.cpu_count() or 1
+    pairs = [(line1, line2) for _, line1, line2 in records]
+    chunks = [pairs[start:start + chunk_size] for start in range(0, len(pairs), chunk_size)]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        # Warm the pool up so process start-up is not measured
+        list(executor.map(_decode_chunk, [[]] * workers))
+
+        def run(chunks):
+            submitted = [(time.perf_counter_ns(), executor.submit(_decode_chunk, chunk)) for chunk in chunks]
+            latencies = []
+            for before, future in submitted:
+                future.result()
+                latencies.append(time.perf_counter_ns() - before)
+            return latencies
+        return _time_chunks(run, chunks)
+
+BENCHMARKS = {
+    "decode": bench_decode,
+    "encode": bench_encode,
+    "checksum": bench_checksum,
+    "batch": bench_batch,
+    "parallel": bench_parallel,
+}
+
+def run_benchmarks(modes=MODES, size=10000, invalid_rate=0.1, seed=567, **options):
+    """
+    Run the selected benchmark modes over one generated dataset and return
+    the results together with the run settings.
+    """
+    records = make_dataset(size, invalid_rate, seed)
+    return {
+        "settings": {"size": size, "invalid_rate": invalid_rate, "seed": seed,
+                     "python": platform.python_version(), "machine": platform.machine()},
+        "results": {mode: BENCHMARKS[mode](records, **options) for mode in modes},
+    }
+
+def compare(baseline, current, threshold=0.1):
+    """
+    Compare throughput against a baseline run. Returns a list of
+    (mode, baseline_rps, current_rps, change) for modes that regressed by
+    more than threshold (a fraction of the baseline throughput).
+    """
+    regressions = []
+    for mode, result in current["results"].items():
+        if mode not in baseline["results"]:
+            continue
+        before = baseline["results"][mode]["records_per_second"]
+        after = result["records_per_second"]
+        change = (after - before) / before if before else 0.0
+        if change < -threshold:
+            regressions.append((mode, before, after, change))
+    return regressions
+
+def main(argv=None):
+    """
+    Command-line entry point: python MRTDbench.py [--output FILE] [--baseline FILE]
+    """
+    parser = argparse.ArgumentParser(description="Benchmark MRTD encode/decode/checksum hot paths.")
+    parser.add_argument("--modes", default=",".join(MODES), help="comma-separated modes to run")
+    parser.add_argument("--size", type=int, default=10000, help="number of records")
+    parser.add_argument("--invalid-rate", type=float, default=0.1, help="fraction of invalid records")
+    parser.add_argument("--seed", type=int, default=567)
+    parser.add_argument("--chunk-size", type=int, default=1000, help="records per chunk in batch/parallel modes")
+    parser.add_argument("--workers", type=int, default=None, help="processes for the parallel mode")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="fail if throughput regressed against this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed throughput regression (fraction)")
+    args = parser.parse_args(argv)
+
+    modes = [mode for mode in args.modes.split(",") if mode]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+    report = run_benchmarks(modes, args.size, args.invalid_rate, args.seed,
+                            chunk_size=args.chunk_size, workers=args.workers)
+    for mode, result in report["results"].items():
+        print(f"{mode:>10}: {result['records_per_second']:>12,.0f} records/s  "
+              f"p50 {result['p50_us']:>9.1f} us  p99 {result['p99_us']:>9.1f} us")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(baseline, report, args.threshold)
+        for mode, before, after, change in regressions:
+            print(f"REGRESSION {mode}: {before:,.0f} -> {after:,.0f} records/s ({change:+.1%})", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+# Command-line usage (excluded from coverage)
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
@@ -0,0 +1,55 @@
+import os
+import json
+import tempfile
+import unittest
+import MRTDbench
+
+class TestBenchmarks(unittest.TestCase):
+    def test_make_dataset_mixes_valid_and_invalid(self):
+        """
+        Test that the generated dataset is reproducible and contains invalid records.
+        """
+        records = MRTDbench.make_dataset(500, invalid_rate=0.2, seed=1)
+        self.assertEqual(records, MRTDbench.make_dataset(500, invalid_rate=0.2, seed=1))
+        processor = MRTDbench.MRZProcessor(log_errors=False)
+        failed = sum(error is not None for _, error in processor.decode_many(
+            (line1, line2) for _, line1, line2 in records))
+        self.assertTrue(50 < failed < 150)
+
+    def test_run_benchmarks_reports_every_mode(self):
+        """
+        Test that each mode reports throughput and latency percentiles.
+        """
+        report = MRTDbench.run_benchmarks(size=200, chunk_size=50, workers=2)
+        self.assertEqual(set(report["results"]), set(MRTDbench.MODES))
+        for result in report["results"].values():
+            self.assertEqual(result["records"], 200)
+            self.assertGreater(result["records_per_second"], 0)
+            self.assertLessEqual(result["p50_us"], result["p99_us"])
+
+    def test_compare_flags_regressions(self):
+        """
+        Test that compare only reports modes slower than the threshold allows.
+        """
+        baseline = {"results": {"decode": {"records_per_second": 1000}, "encode": {"records_per_second": 1000}}}
+        current = {"results": {"decode": {"records_per_second": 850}, "encode": {"records_per_second": 950}}}
+        regressions = MRTDbench.compare(baseline, current, threshold=0.1)
+        self.assertEqual([mode for mode, *_ in regressions], ["decode"])
+
+    def test_main_fails_on_regression(self):
+        """
+        Test that the command line exits non-zero against a faster baseline.
+        """
+        handle, path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(handle, "w") as file:
+            json.dump({"results": {"checksum": {"records_per_second": 1e12}}}, file)
+        try:
+            self.assertEqual(MRTDbench.main(["--modes", "checksum", "--size", "100", "--baseline", path]), 1)
+            self.assertEqual(MRTDbench.main(["--modes", "checksum", "--size", "100", "--output", path]), 0)
+            with open(path) as file:
+                self.assertIn("checksum", json.load(file)["results"])
+        finally:
+            os.remove(path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import math
+import hashlib
+import collections
+
+from MRTD import FIELD_NAMES
+
+# A repeated document: kind is "duplicate" (identical fields), "conflict"
+# (fields differ, listed in fields) or "possible_duplicate" (seen by the
+# Bloom filter only), first and position are the record positions involved.
+Finding = collections.namedtuple("Finding", ["kind", "key", "first", "position", "fields"])
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings, sized for capacity keys at the
+    given false positive rate. Bit positions come from double hashing one
+    BLAKE2b digest, so results do not depend on the interpreter's hash seed.
+    """
+    def __init__(self, capacity, error_rate=0.001):
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        step = int.from_bytes(digest[8:], "little") | 1
+        return [(first + index * step) % self.size for index in range(self.hashes)]
+
+    def add(self, key):
+        """
+        Add a key, returning True if it was possibly present already.
+        """
+        bits = self._bits
+        present = True
+        for position in self._positions(key):
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                present = False
+                bits[position >> 3] |= mask
+        return present
+
+    def __contains__(self, key):
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+class DuplicateIndex:
+    """
+    Streaming duplicate and conflict detector keyed on issuing country plus
+    passport number. The first occurrence of each key is kept in a hash
+    index, and every later occurrence is reported in the same pass as an
+    exact duplicate or as a conflict listing the fields that differ.
+
+    The index grows with every new key. To bound its memory, max_entries
+    caps the index and a Bloom filter sized for bloom_capacity keys
+    remembers the keys beyond it: once the index is full, new keys are only
+    added to the filter and their repeats are reported as possible
+    duplicates. The filter hashes every record, so it costs time rather
+    than saving it and is only accepted together with max_entries.
+    """
+    def __init__(self, max_entries=None, bloom_capacity=None, error_rate=0.001):
+        if (max_entries is None) != (bloom_capacity is None):
+            raise ValueError("max_entries and bloom_capacity must be given together.")
+        self.max_entries = max_entries
+        self.bloom = BloomFilter(bloom_capacity, error_rate) if bloom_capacity else None
+        self.position = 0
+        self.counts = collections.Counter()
+        self._first = {}
+
+    def check(self, record):
+        """
+        Check one data dict or DecodedMRZ record, returning a Finding if its
+        key was seen before and None otherwise.
+        """
+        values = record if isinstance(record, tuple) else tuple(record.get(field) for field in FIELD_NAMES)
+        key = f"{values[1] or ''}{values[3] or ''}"
+        position = self.position
+        self.position += 1
+
+        if self.bloom is not None and not self.bloom.add(key):
+            return self._remember(key, position, values)
+        first = self._first.get(key)
+        if first is None:
+            if self.max_entries is not None and len(self._first) >= self.max_entries:
+                # The first occurrence may have been dropped once the index filled up
+                self.counts["possible_duplicates"] += 1
+                return Finding("possible_duplicate", key, None, position, ())
+            # Never seen: either there is no filter or it gave a false positive
+            return self._remember(key, position, values)
+
+        first_position, first_values = first
+        fields = tuple(field for field, old, new in zip(FIELD_NAMES, first_values, values) if old != new)
+        kind = "conflict" if fields else "duplicate"
+        self.counts[kind + "s"] += 1
+        return Finding(kind, key, first_position, position, fields)
+
+    def _remember(self, key, position, values):
+        self.counts["unique"] += 1
+        if self.max_entries is None or len(self._first) < self.max_entries:
+            self._first[key] = (position, values)
+        return None
+
+    def check_many(self, records):
+        """
+        Check an iterable of records, yielding a Finding for every repeat.
+        """
+        check = self.check
+        for record in records:
+            finding = check(record)
+            if finding is not None:
+                yield finding
+
+    def summary(self):
+        """
+        Return the number of records checked, unique keys, duplicates,
+        conflicts and possible duplicates, and the index size.
+        """
+        return {
+            "records": self.position,
+            "unique": self.counts["unique"],
+            "duplicates": self.counts["duplicates"],
+            "conflicts": self.counts["conflicts"],
+            "possible_duplicates": self.counts["possible_duplicates"],
+            "indexed": len(self._first),
+        }
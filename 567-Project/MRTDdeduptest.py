@@ -0,0 +1,71 @@
+import unittest
+import MRTDgen
+from MRTD import MRZProcessor
+from MRTDdedup import BloomFilter, DuplicateIndex
+
+class TestBloomFilter(unittest.TestCase):
+    def test_membership_and_false_positive_rate(self):
+        """
+        Test that added keys are always found and unseen keys rarely are.
+        """
+        bloom = BloomFilter(2000, error_rate=0.01)
+        self.assertLess(sum(bloom.add("K%d" % number) for number in range(2000)), 40)
+        self.assertTrue(all("K%d" % number in bloom for number in range(2000)))
+        false_positives = sum("U%d" % number in bloom for number in range(10000))
+        self.assertLess(false_positives, 300)
+
+class TestDuplicateIndex(unittest.TestCase):
+    def setUp(self):
+        self.records = [data for data, *_ in MRTDgen.generate(300, seed=4)]
+
+    def test_duplicates_and_conflicts(self):
+        """
+        Test that exact repeats and repeats with different fields are told apart in one pass.
+        """
+        repeated = self.records[10]
+        renamed = dict(self.records[20], Name="COMBS<<ADDISON", **{"Date of Birth": "720916"})
+        other_country = dict(self.records[30], **{"Issuing Country": "XXX"})
+        index = DuplicateIndex()
+        findings = list(index.check_many(self.records + [repeated, renamed, other_country, repeated]))
+        self.assertEqual([(finding.kind, finding.first, finding.position) for finding in findings],
+                         [("duplicate", 10, 300), ("conflict", 20, 301), ("duplicate", 10, 303)])
+        self.assertEqual(findings[1].fields, ("Name", "Date of Birth"))
+        self.assertEqual(findings[0].key, repeated["Issuing Country"] + repeated["Passport Number"])
+        self.assertEqual(index.summary(), {"records": 304, "unique": 301, "duplicates": 2, "conflicts": 1,
+                                           "possible_duplicates": 0, "indexed": 301})
+
+    def test_decoded_records(self):
+        """
+        Test that DecodedMRZ records from decode_many can be checked directly.
+        """
+        processor = MRZProcessor(log_errors=False)
+        pairs = [(line1, line2) for _, line1, line2, _ in MRTDgen.generate(50, seed=4)] * 2
+        index = DuplicateIndex()
+        findings = list(index.check_many(result for result, _ in processor.decode_many(pairs, as_record=True)))
+        self.assertEqual([finding.kind for finding in findings], ["duplicate"] * 50)
+
+    def test_bloom_filter_front_matches_exact_index(self):
+        """
+        Test that a bounded index that never fills up reports the same findings as an unbounded one.
+        """
+        stream = self.records + self.records[::7]
+        exact = list(DuplicateIndex().check_many(stream))
+        filtered = list(DuplicateIndex(max_entries=300, bloom_capacity=50, error_rate=0.2).check_many(stream))
+        self.assertEqual(filtered, exact)
+
+    def test_bounded_index(self):
+        """
+        Test that repeats of keys beyond max_entries are reported as possible duplicates.
+        """
+        index = DuplicateIndex(max_entries=100, bloom_capacity=1000)
+        findings = list(index.check_many(self.records + self.records[50:150]))
+        kinds = [finding.kind for finding in findings]
+        self.assertEqual(kinds, ["duplicate"] * 50 + ["possible_duplicate"] * 50)
+        self.assertEqual(index.summary()["indexed"], 100)
+        with self.assertRaises(ValueError):
+            DuplicateIndex(max_entries=10)
+        with self.assertRaises(ValueError):
+            DuplicateIndex(bloom_capacity=1000)
+
+if __name__ == '__main__':
+    unittest.main()
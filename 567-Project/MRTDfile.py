@@ -0,0 +1,216 @@
+import os
+import sys
+import json
+import mmap
+import argparse
+import itertools
+import collections
+import multiprocessing.util
+import concurrent.futures
+
+from MRTD import MRZProcessor, LINE_LENGTH, configure_logging, stop_logging, read_line_pairs
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+class MRZRecordFile:
+    """
+    Memory-mapped reader for a file of fixed-width MRZ records, each made of
+    line 1 followed by line 2. Records are exposed as zero-copy memoryview
+    slices and can be accessed randomly by index. Shorter or missing lines
+    are padded with trailing spaces, which are ignored when decoding.
+
+    Records and line 2 arrays stay readable after close(): the file is
+    closed at once, but the mapping is only released once no views into it
+    are left.
+    """
+    def __init__(self, path, line_length=None):
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            self._file.close()
+            raise ValueError(f"{path} contains no MRZ records.")
+        self._view = memoryview(self._map)
+
+        # Lines are either newline terminated or packed back to back
+        newline = self._map.find(b'\n')
+        if line_length is None:
+            line_length = LINE_LENGTH if newline == -1 else newline
+        if newline == -1:
+            separator = 0
+        elif newline > 0 and self._map[newline - 1:newline] == b'\r':
+            line_length = min(line_length, newline - 1)
+            separator = 2
+        else:
+            separator = 1
+        self.line_length = line_length
+        self._stride = line_length + separator
+        self.record_size = 2 * self._stride
+
+        # Allow the final line terminator to be missing
+        size = len(self._map)
+        if size % self.record_size and (size + separator) % self.record_size:
+            self.close()
+            raise ValueError(f"{path} is not a sequence of {line_length}-character MRZ line pairs.")
+        self._count = (size + separator) // self.record_size
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        """
+        Return the (line1, line2) memoryviews of the record at index.
+        """
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("MRZ record index out of range")
+        start = index * self.record_size
+        return (self._view[start:start + self.line_length],
+                self._view[start + self._stride:start + self._stride + self.line_length])
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield self[index]
+
+    def decode(self, index, processor=None, as_record=False):
+        """
+        Decode the record at index, returning a (result, error) tuple.
+        """
+        line1, line2 = self[index]
+        return next((processor or MRZProcessor()).decode_many(
+            [(str(line1, 'ascii').rstrip(' '), str(line2, 'ascii').rstrip(' '))], as_record))
+
+    def decode_all(self, processor=None, as_record=False):
+        """
+        Lazily decode every record, yielding (result, error) tuples.
+        Only the record being decoded is turned into Python strings.
+        """
+        return (processor or MRZProcessor()).decode_many(
+            ((str(line1, 'ascii').rstrip(' '), str(line2, 'ascii').rstrip(' ')) for line1, line2 in self), as_record)
+
+    def line2_array(self):
+        """
+        Return an (N, line_length) uint8 view of every line 2 for the
+        vectorized engine in MRTDbatch, without copying the file contents.
+        The view keeps the mapping alive until it is dropped, even after
+        close().
+        """
+        if np is None:
+            raise ImportError("NumPy is required for the line 2 array view.")
+        records = np.frombuffer(self._map, dtype=np.uint8)
+        return np.lib.stride_tricks.as_strided(
+            records[self._stride:], shape=(self._count, self.line_length), strides=(self.record_size, 1),
+            writeable=False)
+
+    def close(self):
+        """
+        Close the underlying file and release the memory map, unless records
+        or arrays still point into it.
+        """
+        try:
+            self._view.release()
+            self._map.close()
+        except BufferError:
+            # Live views hold the map; it is unmapped when the last one is freed
+            pass
+        finally:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _chunks(iterable, size):
+    """
+    Group an iterable into lists of at most size items.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+_worker_processor = None
+
+def _init_worker(log_errors):
+    """
+    Set up the processor and error logging of a worker process.
+    """
+    global _worker_processor
+    _worker_processor = MRZProcessor(log_errors=log_errors)
+    if log_errors:
+        configure_logging()
+        # Worker processes skip atexit handlers, so flush on multiprocessing exit
+        multiprocessing.util.Finalize(None, stop_logging, exitpriority=10)
+
+def _decode_chunk(pairs):
+    """
+    Decode a chunk of line pairs inside a worker process.
+    """
+    return list(_worker_processor.decode_many(pairs, as_record=True))
+
+def validate_file(path, output, workers=None, chunk_size=10000, log_errors=True):
+    """
+    Decode every MRZ line pair in a file across a process pool and write one
+    JSON line per record to output, in input order.
+    Errors are logged by the workers unless log_errors is False.
+    Returns a (valid, failed) tuple of record counts.
+    """
+    workers = workers or os.cpu_count() or 1
+    valid = failed = 0
+    with open(path, encoding='ascii', errors='replace') as file, \
+            concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                   initargs=(log_errors,)) as executor:
+        # Keep a bounded window of chunks in flight so memory stays constant
+        window = 2 * workers
+        pending = collections.deque()
+        chunks = _chunks(read_line_pairs(file), chunk_size)
+        while True:
+            while len(pending) < window:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                pending.append(executor.submit(_decode_chunk, chunk))
+            if not pending:
+                break
+            for record, error in pending.popleft().result():
+                if error is None:
+                    valid += 1
+                    result = record.as_dict()
+                else:
+                    failed += 1
+                    result = None
+                output.write(json.dumps({"result": result, "error": error}) + "\n")
+    return valid, failed
+
+def main(argv=None):
+    """
+    Command-line entry point: python MRTDfile.py FILE --workers N
+    """
+    parser = argparse.ArgumentParser(description="Decode and validate a file of MRZ line pairs.")
+    parser.add_argument("file", help="text file with line 1 and line 2 of each MRZ on consecutive lines")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="records per worker task")
+    parser.add_argument("--output", default="-", help="JSON Lines output file (default: stdout)")
+    parser.add_argument("--no-log", action="store_true", help="do not log individual record errors")
+    args = parser.parse_args(argv)
+
+    if args.output == "-":
+        valid, failed = validate_file(args.file, sys.stdout, args.workers, args.chunk_size, not args.no_log)
+    else:
+        with open(args.output, "w") as output:
+            valid, failed = validate_file(args.file, output, args.workers, args.chunk_size, not args.no_log)
+    print(f"Valid: {valid}, Failed: {failed}", file=sys.stderr)
+    return 0 if failed == 0 else 1
+
+# Command-line usage (excluded from coverage)
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
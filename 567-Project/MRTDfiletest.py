@@ -0,0 +1,125 @@
+import io
+import os
+import json
+import tempfile
+import unittest
+from unittest.mock import patch
+import MRTD
+import MRTDbatch
+import MRTDfile
+from MRTD import MRZProcessor, MRZError
+
+class TestValidateFile(unittest.TestCase):
+    def setUp(self):
+        processor = MRZProcessor()
+        self.lines = []
+        for passport_number in ["V855996J7", "L898902C3", "123456789"]:
+            self.lines.extend(processor.encode_mrz({"Passport Number": passport_number}))
+        self.lines[3] = self.lines[3][:-1] + '9' if self.lines[3][-1] != '9' else self.lines[3][:-1] + '8'
+        handle, self.path = tempfile.mkstemp(suffix=".txt")
+        with os.fdopen(handle, "w") as file:
+            file.write("\n".join(self.lines) + "\n")
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_read_line_pairs(self):
+        """
+        Test that read_line_pairs pairs consecutive lines and pads an odd trailing line.
+        """
+        pairs = list(MRTD.read_line_pairs(io.StringIO("a\nb\nc\n")))
+        self.assertEqual(pairs, [("a", "b"), ("c", "")])
+
+    def test_validate_file_preserves_order(self):
+        """
+        Test that validate_file writes one JSON line per record in input order.
+        """
+        output = io.StringIO()
+        valid, failed = MRTDfile.validate_file(self.path, output, workers=2, chunk_size=1, log_errors=False)
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual((valid, failed), (2, 1))
+        self.assertEqual([record["error"] for record in records], [None, MRZError.PERSONAL_NUMBER, None])
+        self.assertEqual(records[2]["result"]["Passport Number"], "123456789")
+
+    def test_main_reports_failures(self):
+        """
+        Test that the command line writes JSON lines to --output and exits with 1 when a record fails.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            target = os.path.join(directory, "results.jsonl")
+            with patch("sys.stderr", io.StringIO()) as log:
+                self.assertEqual(MRTDfile.main([self.path, "--workers", "1", "--no-log", "--output", target]), 1)
+            with open(target) as file:
+                self.assertEqual(len(file.read().splitlines()), 3)
+        self.assertIn("Valid: 2, Failed: 1", log.getvalue())
+
+class TestMRZRecordFile(unittest.TestCase):
+    def setUp(self):
+        processor = MRZProcessor()
+        self.pairs = [processor.encode_mrz({"Passport Number": passport_number})
+                      for passport_number in ["V855996J7", "L898902C3", "123456789"]]
+        self.pairs = [(line1, line2.ljust(44, '<')) for line1, line2 in self.pairs]
+        handle, self.path = tempfile.mkstemp(suffix=".mrz")
+        with os.fdopen(handle, "w") as file:
+            file.write("".join(line1 + "\n" + line2 + "\n" for line1, line2 in self.pairs))
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_random_access(self):
+        """
+        Test that records can be read by index as memoryviews.
+        """
+        with MRTDfile.MRZRecordFile(self.path) as records:
+            self.assertEqual(len(records), 3)
+            line1, line2 = records[-1]
+            self.assertIsInstance(line2, memoryview)
+            self.assertEqual(bytes(line2).decode(), self.pairs[2][1])
+            self.assertEqual(bytes(line1).decode(), self.pairs[2][0])
+            del line1, line2
+            with self.assertRaises(IndexError):
+                records[3]
+
+    def test_decode_all(self):
+        """
+        Test that every record decodes through the memory map.
+        """
+        with MRTDfile.MRZRecordFile(self.path) as records:
+            results = list(records.decode_all())
+            self.assertEqual([error for _, error in results], [None, None, None])
+            self.assertEqual(records.decode(1)[0]["Passport Number"], "L898902C3")
+
+    def test_rejects_ragged_file(self):
+        """
+        Test that a file that is not a sequence of fixed-width pairs is rejected.
+        """
+        with open(self.path, "a") as file:
+            file.write("P<UTO\n")
+        with self.assertRaises(ValueError):
+            MRTDfile.MRZRecordFile(self.path)
+
+    def test_records_held_across_close(self):
+        """
+        Test that closing with live records closes the file and keeps the records readable.
+        """
+        with MRTDfile.MRZRecordFile(self.path) as records:
+            line1, line2 = records[0]
+            rows = list(records)
+        self.assertTrue(records._file.closed)
+        self.assertEqual(bytes(line2).decode(), self.pairs[0][1])
+        self.assertEqual([bytes(line1).decode() for line1, _ in rows], [line1 for line1, _ in self.pairs])
+        with self.assertRaises(ValueError):
+            records[1]
+
+    @unittest.skipIf(MRTDfile.np is None, "NumPy is not installed")
+    def test_line2_array(self):
+        """
+        Test that the zero-copy line 2 view feeds the vectorized engine.
+        """
+        with MRTDfile.MRZRecordFile(self.path) as records:
+            array = records.line2_array()
+            self.assertEqual(MRTDbatch.batch_validate(array).tolist(), [True, True, True])
+        self.assertEqual(MRTDbatch.batch_validate(array).tolist(), [True, True, True])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+import os
+import sys
+import random
+import shutil
+import argparse
+import tempfile
+import concurrent.futures
+
+from MRTD import MRZProcessor, LINE_LENGTH
+
+# Error types that can be injected into generated records
+ERROR_TYPES = ("check_digit", "truncation", "missing_line")
+
+# Line 2 columns holding a check digit
+CHECK_DIGIT_COLUMNS = (9, 19, 27, 42)
+
+COUNTRIES = ("UTO", "TJK", "USA", "DEU", "FRA", "IND", "CHN", "BRA", "NGA", "GBR", "CAN", "MEX", "JPN", "KEN")
+SURNAMES = ("DOE", "COMBS", "ERIKSSON", "SMITH", "GARCIA", "MULLER", "ROSSI", "KUMAR", "WANG", "SILVA",
+            "OKAFOR", "TANAKA", "NGUYEN", "BROWN", "MARTIN", "IVANOV")
+GIVEN_NAMES = ("JOHN", "JANE", "ADDISON", "ANNA", "MARIA", "QUINCY", "LI", "PRIYA", "CARLOS", "YUKI",
+               "AMARA", "OLIVER", "SOFIA", "AHMED", "ELIZABETH", "LUCAS")
+DOCUMENT_LETTERS = "ABCDEFGHJKLMNPRSTUVWXYZ"
+
+def _date(rng, first_year, last_year):
+    return "%02d%02d%02d" % (rng.randint(first_year, last_year) % 100, rng.randint(1, 12), rng.randint(1, 28))
+
+def generate(count, seed=567, invalid_rate=0.0, error_types=ERROR_TYPES, start=0):
+    """
+    Yield count (data, line1, line2, error_type) records encoded with
+    encode_mrz. Passport numbers are unique per record index (starting at
+    start), and invalid_rate of the records get one of error_types injected:
+    a wrong check digit, a truncated line 2 or a missing line 2. error_type
+    is None for valid records.
+    """
+    rng = random.Random(seed)
+    choice = rng.choice
+    encode = MRZProcessor().encode_mrz
+    for number in range(start, start + count):
+        data = {
+            "Document Type": "P",
+            "Issuing Country": choice(COUNTRIES),
+            "Name": "%s<<%s<%s" % (choice(SURNAMES), choice(GIVEN_NAMES), choice(GIVEN_NAMES)),
+            "Passport Number": "%s%08d" % (choice(DOCUMENT_LETTERS), number % 10 ** 8),
+            "Nationality": choice(COUNTRIES),
+            "Date of Birth": _date(rng, 1940, 2020),
+            "Gender": choice("MF"),
+            "Expiration Date": _date(rng, 2020, 2035),
+            "Personal Number": "%09d" % rng.randrange(10 ** 9),
+        }
+        line1, line2 = encode(data)
+        error_type = None
+        if invalid_rate and rng.random() < invalid_rate:
+            error_type = choice(error_types)
+            if error_type == "check_digit":
+                column = choice(CHECK_DIGIT_COLUMNS)
+                line2 = line2[:column] + str((int(line2[column]) + rng.randint(1, 9)) % 10) + line2[column + 1:]
+            elif error_type == "truncation":
+                line2 = line2[:rng.randint(10, 40)]
+            else:
+                line2 = ""
+        yield data, line1, line2, error_type
+
+def write_records(output, records, fixed_width=True):
+    """
+    Write (data, line1, line2, error_type) records to a text stream, one MRZ
+    line per text line. With fixed_width, every line is padded with spaces
+    to 44 characters so that MRTDfile.MRZRecordFile can map the file.
+    Returns the number of records written.
+    """
+    written = 0
+    if fixed_width:
+        for _, line1, line2, _ in records:
+            output.write(f"{line1:{LINE_LENGTH}}\n{line2:{LINE_LENGTH}}\n")
+            written += 1
+    else:
+        for _, line1, line2, _ in records:
+            output.write(f"{line1}\n{line2}\n")
+            written += 1
+    return written
+
+def _shards(count, seed, shard_size):
+    """
+    Yield the (count, seed, start) of each shard of count records.
+    """
+    for index, start in enumerate(range(0, count, shard_size)):
+        yield min(shard_size, count - start), seed * 1000003 + index, start
+
+def generate_shards(count, seed=567, invalid_rate=0.0, error_types=ERROR_TYPES, shard_size=100000):
+    """
+    Yield the records generate_file writes: count records generated in
+    shards of shard_size, each seeded from seed and its shard index, so the
+    output does not depend on how many processes generate it.
+    """
+    for shard_count, shard_seed, start in _shards(count, seed, shard_size):
+        yield from generate(shard_count, shard_seed, invalid_rate, error_types, start)
+
+def _write_shard(path, count, seed, invalid_rate, error_types, start, fixed_width):
+    """
+    Generate one shard of records into its own file inside a worker process.
+    """
+    with open(path, "w") as output:
+        return write_records(output, generate(count, seed, invalid_rate, error_types, start), fixed_width)
+
+def generate_file(path, count, seed=567, invalid_rate=0.0, error_types=ERROR_TYPES, fixed_width=True,
+                  workers=1, shard_size=100000):
+    """
+    Generate the records of generate_shards into path. With more than one
+    worker, the shards are generated in parallel processes and concatenated
+    in order; the file is the same for any number of workers.
+    Returns the number of records written.
+    """
+    if workers <= 1:
+        with open(path, "w") as output:
+            return write_records(output, generate_shards(count, seed, invalid_rate, error_types, shard_size),
+                                 fixed_width)
+
+    directory = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        shards = []
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = []
+            for shard_count, shard_seed, start in _shards(count, seed, shard_size):
+                shard_path = os.path.join(directory, f"shard{len(shards)}")
+                shards.append(shard_path)
+                futures.append(executor.submit(_write_shard, shard_path, shard_count, shard_seed, invalid_rate,
+                                               error_types, start, fixed_width))
+            for future in futures:
+                future.result()
+        with open(path, "wb") as output:
+            for shard_path in shards:
+                with open(shard_path, "rb") as shard:
+                    shutil.copyfileobj(shard, output)
+        return count
+    finally:
+        shutil.rmtree(directory)
+
+def main(argv=None):
+    """
+    Command-line entry point: python MRTDgen.py OUTPUT --count N
+    """
+    parser = argparse.ArgumentParser(description="Generate synthetic MRZ line pairs for load testing.")
+    parser.add_argument("output", help="output file, or - for stdout")
+    parser.add_argument("--count", type=int, default=1000000, help="number of records")
+    parser.add_argument("--seed", type=int, default=567)
+    parser.add_argument("--invalid-rate", type=float, default=0.0, help="fraction of invalid records")
+    parser.add_argument("--errors", default=",".join(ERROR_TYPES),
+                        help="comma-separated error types to inject: " + ", ".join(ERROR_TYPES))
+    parser.add_argument("--lines", action="store_true", help="write unpadded lines instead of fixed-width records")
+    parser.add_argument("--workers", type=int, default=1, help="processes used to generate file output")
+    args = parser.parse_args(argv)
+
+    error_types = tuple(error for error in args.errors.split(",") if error)
+    unknown = set(error_types) - set(ERROR_TYPES)
+    if unknown or not error_types:
+        parser.error(f"unknown error types: {', '.join(sorted(unknown)) or '(none given)'}")
+    if args.output == "-":
+        write_records(sys.stdout, generate_shards(args.count, args.seed, args.invalid_rate, error_types),
+                      not args.lines)
+    else:
+        generate_file(args.output, args.count, args.seed, args.invalid_rate, error_types, not args.lines,
+                      args.workers)
+    return 0
+
+# Command-line usage (excluded from coverage)
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
@@ -0,0 +1,120 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import MRTDgen
+from MRTD import MRZProcessor, MRZError, read_line_pairs
+from MRTDfile import MRZRecordFile
+
+class TestGenerate(unittest.TestCase):
+    def setUp(self):
+        self.processor = MRZProcessor(log_errors=False)
+
+    def test_generated_records_are_valid_and_reproducible(self):
+        """
+        Test that records decode back to their data and that a seed repeats the output.
+        """
+        records = list(MRTDgen.generate(200, seed=3))
+        self.assertEqual(records, list(MRTDgen.generate(200, seed=3)))
+        self.assertNotEqual(records, list(MRTDgen.generate(200, seed=4)))
+        for data, line1, line2, error_type in records:
+            self.assertIsNone(error_type)
+            result, error = next(self.processor.decode_many([(line1, line2)]))
+            self.assertIsNone(error)
+            self.assertEqual(result["Passport Number"], data["Passport Number"])
+        self.assertEqual(len({data["Passport Number"] for data, *_ in records}), 200)
+
+    def test_invalid_records_match_their_error_type(self):
+        """
+        Test that each injected error type fails decoding the expected way.
+        """
+        expected = {
+            "check_digit": {MRZError.PASSPORT_NUMBER, MRZError.BIRTH_DATE,
+                            MRZError.EXPIRATION_DATE, MRZError.PERSONAL_NUMBER},
+            "truncation": {MRZError.INVALID_FORMAT},
+            "missing_line": {MRZError.MISSING_DATA},
+        }
+        records = list(MRTDgen.generate(1000, seed=1, invalid_rate=0.3))
+        injected = [error_type for *_, error_type in records if error_type]
+        self.assertTrue(200 < len(injected) < 400)
+        self.assertEqual(set(injected), set(MRTDgen.ERROR_TYPES))
+        for _, line1, line2, error_type in records:
+            _, error = next(self.processor.decode_many([(line1, line2)]))
+            if error_type is None:
+                self.assertIsNone(error)
+            else:
+                self.assertIn(error, expected[error_type])
+
+    def test_error_types_can_be_restricted(self):
+        """
+        Test that only the requested error types are injected.
+        """
+        records = MRTDgen.generate(300, seed=2, invalid_rate=0.5, error_types=("truncation",))
+        self.assertEqual({error_type for *_, error_type in records}, {None, "truncation"})
+
+class TestGeneratedFiles(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "records.txt")
+        self.processor = MRZProcessor(log_errors=False)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def expected_errors(self, count, seed, invalid_rate):
+        return [error for _, error in self.processor.decode_many(
+            (line1, line2) for _, line1, line2, _ in MRTDgen.generate_shards(count, seed, invalid_rate))]
+
+    def test_fixed_width_file_is_mappable(self):
+        """
+        Test that fixed-width output decodes through MRZRecordFile like the generated pairs.
+        """
+        MRTDgen.generate_file(self.path, 300, seed=5, invalid_rate=0.2)
+        with MRZRecordFile(self.path) as records:
+            self.assertEqual(len(records), 300)
+            errors = [error for _, error in records.decode_all(self.processor)]
+        self.assertEqual(errors, self.expected_errors(300, 5, 0.2))
+
+    def test_parallel_output_matches_sharded_generation(self):
+        """
+        Test that parallel generation writes every shard in order.
+        """
+        written = MRTDgen.generate_file(self.path, 250, seed=5, invalid_rate=0.2, fixed_width=False,
+                                        workers=2, shard_size=100)
+        self.assertEqual(written, 250)
+        with open(self.path) as file:
+            pairs = list(read_line_pairs(file))
+        expected = []
+        for index, start in enumerate(range(0, 250, 100)):
+            expected += [(line1, line2) for _, line1, line2, _ in
+                         MRTDgen.generate(min(100, 250 - start), 5 * 1000003 + index, 0.2, start=start)]
+        self.assertEqual(pairs, expected)
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ["records.txt"])
+
+    def test_output_does_not_depend_on_workers(self):
+        """
+        Test that a seed gives the same file for any number of workers.
+        """
+        contents = []
+        for workers in (1, 2, 3):
+            MRTDgen.generate_file(self.path, 250, seed=1, invalid_rate=0.2, workers=workers, shard_size=100)
+            with open(self.path) as file:
+                contents.append(file.read())
+        self.assertEqual(contents[1:], contents[:1] * 2)
+        self.assertEqual(len(contents[0]), 250 * 2 * 45)
+
+    def test_main_writes_stream(self):
+        """
+        Test that the command line writes unpadded pairs to stdout and rejects unknown error types.
+        """
+        output = io.StringIO()
+        with patch("sys.stdout", output):
+            self.assertEqual(MRTDgen.main(["-", "--count", "10", "--lines"]), 0)
+        lines = output.getvalue().splitlines()
+        self.assertEqual(len(lines), 20)
+        with self.assertRaises(SystemExit), patch("sys.stderr", io.StringIO()):
+            MRTDgen.main(["-", "--errors", "smudge"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import time
+import bisect
+import pstats
+import cProfile
+import threading
+import itertools
+
+# Upper bounds in seconds of the Instrumentation latency histogram buckets
+HISTOGRAM_BOUNDS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 1e-2, 1e-1, 1.0)
+
+class Instrumentation:
+    """
+    Optional per-stage timing for MRZProcessor. Attaching it replaces the
+    processor's decode and encode stages with wrappers that record call
+    counts, total time and a latency histogram per stage using a monotonic
+    clock; processors without it run the plain stages. Every profile_every-th
+    decode or encode call can additionally be run under cProfile.
+    """
+    def __init__(self, profile_every=0):
+        self.profile_every = profile_every
+        self.profiler = cProfile.Profile() if profile_every else None
+        self._bounds_ns = [int(bound * 1e9) for bound in HISTOGRAM_BOUNDS]
+        self._stages = {}
+        self._calls = 0
+        self._lock = threading.Lock()
+
+    def attach(self, processor):
+        """
+        Wrap the stages of a processor with timers.
+        """
+        for attribute, stage in (("_slice_fields", "slicing"), ("_normalize_name", "name"),
+                                 ("_check_digits", "checksum"), ("_fail", "logging"),
+                                 ("_encode_check_digits", "encode_checksum")):
+            setattr(processor, attribute, self.timed(stage, getattr(processor, attribute)))
+        processor._decode = self.timed("decode", processor._decode, profile=True)
+        processor.encode_mrz = self.timed("encode", processor.encode_mrz, profile=True)
+
+    def timed(self, stage, function, profile=False):
+        """
+        Return a wrapper around function that records its duration under stage.
+        """
+        with self._lock:
+            self._stages.setdefault(stage, [0, 0, [0] * (len(self._bounds_ns) + 1)])
+        clock = time.perf_counter_ns
+
+        def wrapper(*args):
+            if profile and self.profiler is not None and self._sample():
+                start = clock()
+                self.profiler.enable()
+                try:
+                    return function(*args)
+                finally:
+                    self.profiler.disable()
+                    self._observe(stage, clock() - start)
+            start = clock()
+            try:
+                return function(*args)
+            finally:
+                self._observe(stage, clock() - start)
+        return wrapper
+
+    def _sample(self):
+        with self._lock:
+            self._calls += 1
+            return self._calls % self.profile_every == 0
+
+    def _observe(self, stage, elapsed_ns):
+        bucket = bisect.bisect_left(self._bounds_ns, elapsed_ns)
+        with self._lock:
+            counters = self._stages[stage]
+            counters[0] += 1
+            counters[1] += elapsed_ns
+            counters[2][bucket] += 1
+
+    def snapshot(self):
+        """
+        Return per-stage counts, total seconds and cumulative histogram buckets.
+        """
+        with self._lock:
+            snapshot = {}
+            for stage, (count, total_ns, buckets) in self._stages.items():
+                cumulative = list(itertools.accumulate(buckets))
+                snapshot[stage] = {
+                    "count": count,
+                    "total_seconds": total_ns / 1e9,
+                    "buckets": dict(zip([str(bound) for bound in HISTOGRAM_BOUNDS] + ["+Inf"], cumulative)),
+                }
+            return snapshot
+
+    def prometheus(self):
+        """
+        Return the stage histograms in the Prometheus text exposition format.
+        """
+        lines = ["# HELP mrz_stage_seconds Time spent in MRZProcessor decode and encode stages.",
+                 "# TYPE mrz_stage_seconds histogram"]
+        for stage, data in sorted(self.snapshot().items()):
+            for bound, count in data["buckets"].items():
+                lines.append(f'mrz_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+            lines.append(f'mrz_stage_seconds_sum{{stage="{stage}"}} {data["total_seconds"]}')
+            lines.append(f'mrz_stage_seconds_count{{stage="{stage}"}} {data["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def profile_stats(self, stream=None):
+        """
+        Return pstats.Stats for the sampled calls, or None if profiling is off.
+        """
+        if self.profiler is None:
+            return None
+        return pstats.Stats(self.profiler, stream=stream)
@@ -0,0 +1,55 @@
+import io
+import unittest
+from MRTD import MRZProcessor
+from MRTDinstrument import Instrumentation
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.instrumentation = Instrumentation()
+        self.processor = MRZProcessor(log_errors=False, instrumentation=self.instrumentation)
+        self.lines = self.processor.encode_mrz({"Passport Number": "V855996J7"})
+
+    def test_stage_counters(self):
+        """
+        Test that every decode and encode stage is counted.
+        """
+        self.processor.decode(*self.lines)
+        self.processor.decode(self.lines[0], self.lines[1][:-1] + ('9' if self.lines[1][-1] != '9' else '8'))
+        snapshot = self.instrumentation.snapshot()
+        counts = {stage: data["count"] for stage, data in snapshot.items()}
+        self.assertEqual(counts, {"slicing": 2, "name": 2, "checksum": 2, "logging": 1,
+                                  "encode_checksum": 1, "decode": 2, "encode": 1})
+        self.assertEqual(snapshot["decode"]["buckets"]["+Inf"], 2)
+        self.assertGreater(snapshot["decode"]["total_seconds"], 0)
+
+    def test_results_unchanged(self):
+        """
+        Test that instrumented decoding returns the same results.
+        """
+        self.assertEqual(self.processor.decode(*self.lines), MRZProcessor().decode(*self.lines))
+
+    def test_prometheus_format(self):
+        """
+        Test the Prometheus text exposition output.
+        """
+        self.processor.decode(*self.lines)
+        text = self.instrumentation.prometheus()
+        self.assertIn("# TYPE mrz_stage_seconds histogram", text)
+        self.assertIn('mrz_stage_seconds_bucket{stage="decode",le="+Inf"} 1', text)
+        self.assertIn('mrz_stage_seconds_count{stage="checksum"} 1', text)
+
+    def test_sampled_profiling(self):
+        """
+        Test that every profile_every-th call is profiled.
+        """
+        instrumentation = Instrumentation(profile_every=2)
+        processor = MRZProcessor(instrumentation=instrumentation)
+        self.assertIsNone(self.instrumentation.profile_stats())
+        for _ in range(4):
+            processor.decode(*self.lines)
+        stats = instrumentation.profile_stats(stream=io.StringIO())
+        calls = [data[1] for function, data in stats.stats.items() if function[2] == "run_check_plan"]
+        self.assertEqual(calls, [2])
+
+if __name__ == '__main__':
+    unittest.main()
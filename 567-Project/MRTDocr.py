@@ -0,0 +1,112 @@
+import time
+import collections
+
+from MRTD import DAMM_TABLE, DIGIT_VALUES
+
+# Common OCR confusions between MRZ letters and digits
+OCR_CONFUSABLES = {'O': '0', '0': 'O', 'I': '1', '1': 'I', 'B': '8', '8': 'B', 'S': '5', '5': 'S'}
+
+def _ocr_readings(char, numeric):
+    """
+    Return the (character, substitutions) readings of a scanned character.
+    Alphanumeric positions may swap a confusable in either direction.
+    Numeric positions only turn letters into digits, and a letter there has
+    to be corrected, so it has no reading of its own.
+    """
+    alternative = OCR_CONFUSABLES.get(char)
+    if not numeric:
+        return ((char, 0),) if alternative is None else ((char, 0), (alternative, 1))
+    if char in DIGIT_VALUES or char == '<':
+        return ((char, 0),)
+    if alternative is not None:
+        return ((alternative, 1),)
+    return ()
+
+# A ranked OCR correction: number of substitutions, corrected lines and the
+# (line, position, old, new) substitutions applied
+Correction = collections.namedtuple("Correction", ["cost", "lines", "substitutions"])
+
+def _prune(frontier, limit):
+    """
+    Keep the limit cheapest partial paths for every Damm state.
+    """
+    for key, paths in frontier.items():
+        if len(paths) > limit:
+            paths.sort(key=lambda path: path[0])
+            del paths[limit:]
+    return frontier
+
+def _apply_check(frontier, lines, check, want_state, max_substitutions, keep_field):
+    """
+    Keep the paths whose state matches the (possibly substituted) check digit
+    at check = (line, position); want_state picks the state to compare.
+    Unless keep_field is set, the field state is reset for the next field.
+    """
+    line_index, position = check
+    matched = collections.defaultdict(list)
+    for option, extra in _ocr_readings(lines[line_index][position], True):
+        digit = DIGIT_VALUES.get(option)
+        if digit is None:
+            continue
+        for key, paths in frontier.items():
+            if want_state(key) != digit:
+                continue
+            target = key if keep_field else (0, key[1])
+            for cost, path in paths:
+                if cost + extra <= max_substitutions:
+                    matched[target].append((cost + extra, (path, (line_index, position, option)) if extra else path))
+    return matched
+
+def recover_lines(lines, layout, max_substitutions=2, max_candidates=5, time_budget=None):
+    """
+    Search for the fewest OCR confusable substitutions (OCR_CONFUSABLES) in
+    the checked fields and check digits that make every check digit of a
+    layout pass. Dates and check digits only accept letter to digit
+    corrections (see _ocr_readings). Dynamic programming runs over (field state, composite state)
+    pairs of the Damm state machine, keeping the max_candidates cheapest
+    partial corrections per state instead of enumerating combinations.
+    Returns up to max_candidates Corrections ranked by cost, or an empty list
+    if none is found within the substitution limit or time_budget seconds.
+    """
+    deadline = None if time_budget is None else time.monotonic() + time_budget
+    table = DAMM_TABLE
+    numeric = layout.numeric_positions
+    frontier = {(0, 0): [(0, None)]}
+    for line_index, positions, index, in_composite, check in layout.validate_steps:
+        line = lines[line_index]
+        for position in positions:
+            if deadline is not None and time.monotonic() >= deadline:
+                return []
+            options = tuple((option, extra, DIGIT_VALUES.get(option)) for option, extra in
+                            _ocr_readings(line[position], (line_index, position) in numeric))
+            advanced = collections.defaultdict(list)
+            for (field, composite), paths in frontier.items():
+                for option, extra, digit in options:
+                    if digit is None:
+                        key = (field, composite)
+                    else:
+                        key = (table[field][digit] if index is not None else field,
+                               table[composite][digit] if in_composite else composite)
+                    for cost, path in paths:
+                        if cost + extra <= max_substitutions:
+                            advanced[key].append(
+                                (cost + extra, (path, (line_index, position, option)) if extra else path))
+            frontier = _prune(advanced, max_candidates)
+        if index is not None:
+            frontier = _prune(_apply_check(frontier, lines, check, lambda key: key[0], max_substitutions, False),
+                              max_candidates)
+    final = _apply_check(frontier, lines, layout.check_positions[-1], lambda key: key[1], max_substitutions, True)
+
+    candidates = sorted((path for paths in final.values() for path in paths), key=lambda path: path[0])
+    corrections = []
+    for cost, path in candidates[:max_candidates]:
+        substitutions = []
+        while path is not None:
+            path, (line_index, position, option) = path
+            substitutions.append((line_index, position, lines[line_index][position], option))
+        substitutions.reverse()
+        corrected = [list(line) for line in lines]
+        for line_index, position, _, option in substitutions:
+            corrected[line_index][position] = option
+        corrections.append(Correction(cost, tuple(''.join(line) for line in corrected), tuple(substitutions)))
+    return corrections
@@ -0,0 +1,74 @@
+import random
+import unittest
+import MRTD
+import MRTDgen
+import MRTDocr
+from MRTD import MRZProcessor
+
+class TestRecoverMRZ(unittest.TestCase):
+    def setUp(self):
+        self.processor = MRZProcessor(log_errors=False)
+        self.line1, self.line2 = self.processor.encode_mrz({"Passport Number": "V855996J7", "Date of Birth": "800101"})
+        # OCR read the zeros of the birth date as the letter O
+        self.misread = self.line2[:13] + "8OO1O1" + self.line2[19:]
+
+    def test_valid_mrz_is_first_candidate(self):
+        """
+        Test that a valid MRZ is returned unchanged with cost 0.
+        """
+        candidates = self.processor.recover_mrz(self.line1, self.line2)
+        self.assertEqual(candidates[0], MRTDocr.Correction(0, (self.line1, self.line2), ()))
+
+    def test_recovers_confused_characters(self):
+        """
+        Test that the cheapest candidate restores the misread digits and validates.
+        """
+        self.assertIsNot(self.processor.validate_mrz(self.line1, self.misread), True)
+        candidates = self.processor.recover_mrz(self.line1, self.misread, max_substitutions=4)
+        self.assertTrue(candidates)
+        self.assertEqual([candidate.cost for candidate in candidates], sorted(candidate.cost for candidate in candidates))
+        for candidate in candidates:
+            self.assertIs(self.processor.validate_mrz(*candidate.lines), True)
+            self.assertEqual(len(candidate.substitutions), candidate.cost)
+        self.assertIn((self.line1, self.line2), [candidate.lines for candidate in candidates])
+
+    def test_numeric_fields_stay_numeric(self):
+        """
+        Test that candidates never turn date or check digits into letters and fix letters read there.
+        """
+        rng = random.Random(7)
+        to_letter = {digit: letter for letter, digit in MRTDocr.OCR_CONFUSABLES.items() if letter.isalpha()}
+        numeric = sorted(position for line, position in MRTD.TD3.numeric_positions)
+        for _, line1, line2, _ in MRTDgen.generate(100, seed=3):
+            positions = [position for position in range(42) if line2[position] in to_letter]
+            misread = list(line2)
+            for position in rng.sample(positions, 2):
+                misread[position] = to_letter[line2[position]]
+            for candidate in self.processor.recover_mrz(line1, "".join(misread), max_substitutions=3):
+                self.assertTrue(all(candidate.lines[1][position] in MRTD.DIGITS + "<" for position in numeric))
+                self.assertTrue(all(new.isdigit() for line, position, old, new in candidate.substitutions
+                                    if position in numeric))
+
+            # A letter in a date has exactly one fix
+            position = rng.choice([position for position in numeric if line2[position] in to_letter])
+            misread = line2[:position] + to_letter[line2[position]] + line2[position + 1:]
+            self.assertEqual(self.processor.recover_mrz(line1, misread)[0].lines, (line1, line2))
+
+    def test_budgets(self):
+        """
+        Test that the substitution and time budgets bound the search.
+        """
+        self.assertEqual(self.processor.recover_mrz(self.line1, self.misread, max_substitutions=0), [])
+        self.assertEqual(self.processor.recover_mrz(self.line1, self.misread, time_budget=0), [])
+        candidates = self.processor.recover_mrz(self.line1, self.line2, max_substitutions=4, max_candidates=2)
+        self.assertLessEqual(len(candidates), 2)
+
+    def test_invalid_input(self):
+        """
+        Test that missing or short lines give no candidates.
+        """
+        self.assertEqual(self.processor.recover_mrz("", ""), [])
+        self.assertEqual(self.processor.recover_mrz("INVALID_LINE1", "INVALID_LINE2"), [])
+
+if __name__ == '__main__':
+    unittest.main()
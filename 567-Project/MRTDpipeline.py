@@ -0,0 +1,153 @@
+import json
+import asyncio
+import inspect
+
+from MRTD import MRZProcessor, read_line_pairs
+from MRTDdedup import DuplicateIndex
+
+class HardwareScanner:
+    """
+    Scanner producer built on MRZProcessor.hardware_scan, emitting count
+    scans of the simulated device.
+    """
+    def __init__(self, count=1, name="hardware"):
+        self.count = count
+        self.name = name
+        self._processor = MRZProcessor()
+
+    async def run(self, queue):
+        """
+        Put each scanned (line1, line2) pair on the queue.
+        """
+        for _ in range(self.count):
+            self._processor.hardware_scan()
+            await queue.put((self._processor.line1, self._processor.line2))
+
+class SimulatedScanner:
+    """
+    Scanner producer that replays a file of MRZ line pairs at a configurable
+    rate in records per second (None replays as fast as the queue accepts).
+    """
+    def __init__(self, path, rate=None, name=None):
+        self.path = path
+        self.rate = rate
+        self.name = name or path
+
+    async def run(self, queue):
+        """
+        Put each (line1, line2) pair from the file on the queue, pacing the
+        scans against the loop clock so that slow consumers do not add drift.
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        with open(self.path) as file:
+            for index, pair in enumerate(read_line_pairs(file)):
+                if self.rate:
+                    delay = start + index / self.rate - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                # Blocks while the queue is full, which throttles the scanner
+                await queue.put(pair)
+
+class FileSink:
+    """
+    Sink that writes each decoded batch as JSON lines to an open text file.
+    """
+    def __init__(self, file):
+        self.file = file
+
+    def __call__(self, results):
+        self.file.write("".join(json.dumps({"result": result, "error": error}) + "\n"
+                                for result, error in results))
+
+class StoreSink:
+    """
+    Sink that writes the valid records of each batch to an MRTDstore store.
+    The blocking write runs in the default executor, off the event loop.
+    """
+    def __init__(self, store):
+        self.store = store
+
+    async def __call__(self, results):
+        records = [result for result, error in results if error is None]
+        if records:
+            await asyncio.get_running_loop().run_in_executor(None, self.store.write_many, records)
+
+class DedupSink:
+    """
+    Sink stage that checks the valid records of each batch against a
+    DuplicateIndex, collecting duplicate and conflict findings, then passes
+    the batch on to the next sink, if any.
+    """
+    def __init__(self, sink=None, index=None):
+        self.sink = sink
+        self.index = index or DuplicateIndex()
+        self.findings = []
+
+    def __call__(self, results):
+        self.findings.extend(self.index.check_many(result for result, error in results if error is None))
+        if self.sink is not None:
+            return self.sink(results)
+
+async def _decode_worker(queue, processor, sink, batch_size, counts):
+    """
+    Consume line pairs in batches of up to batch_size and hand the decoded
+    results to the sink. Stops on a None sentinel.
+    """
+    while True:
+        pair = await queue.get()
+        batch = []
+        stop = pair is None
+        if not stop:
+            batch.append(pair)
+        # Drain whatever is already queued without waiting for more
+        while not stop and len(batch) < batch_size and not queue.empty():
+            pair = queue.get_nowait()
+            if pair is None:
+                stop = True
+            else:
+                batch.append(pair)
+        if batch:
+            results = list(processor.decode_many(batch))
+            for _, error in results:
+                counts["valid" if error is None else "failed"] += 1
+            outcome = sink(results)
+            if inspect.isawaitable(outcome):
+                await outcome
+        if stop:
+            return
+
+async def run_pipeline(scanners, sink, processor=None, workers=2, queue_size=1000, batch_size=100):
+    """
+    Run scanner producers into a bounded queue consumed by decode workers.
+    Returns a dict with the number of valid and failed records. If a
+    scanner, the decoder or the sink raises, every other task is cancelled
+    and the error is re-raised.
+    """
+    processor = processor or MRZProcessor()
+    queue = asyncio.Queue(maxsize=queue_size)
+    counts = {"valid": 0, "failed": 0}
+    consumers = [asyncio.ensure_future(_decode_worker(queue, processor, sink, batch_size, counts))
+                 for _ in range(workers)]
+
+    async def produce():
+        await asyncio.gather(*(scanner.run(queue) for scanner in scanners))
+        for _ in consumers:
+            await queue.put(None)
+
+    tasks = [asyncio.ensure_future(produce())] + consumers
+    try:
+        # A failed consumer no longer drains the queue, so stop at the first error
+        # instead of leaving the scanners blocked on a full queue
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in tasks:
+            if task in done and not task.cancelled() and task.exception() is not None:
+                raise task.exception()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # Log the failures of the last aggregation period with the run
+        if processor.aggregator is not None:
+            processor.aggregator.flush()
+    return counts
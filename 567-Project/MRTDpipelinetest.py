@@ -0,0 +1,106 @@
+import io
+import os
+import json
+import shutil
+import asyncio
+import tempfile
+import unittest
+from MRTD import MRZProcessor, ErrorAggregator
+from MRTDstore import SQLiteStore
+from MRTDpipeline import HardwareScanner, SimulatedScanner, FileSink, StoreSink, DedupSink, run_pipeline
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        processor = MRZProcessor()
+        self.paths = []
+        for scanner in range(3):
+            path = os.path.join(self.directory, f"scanner{scanner}.txt")
+            with open(path, "w") as file:
+                for number in range(20):
+                    file.write("\n".join(processor.encode_mrz({"Passport Number": "S%dN%06d" % (scanner, number)})) + "\n")
+            self.paths.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_multiple_scanners_to_file_sink(self):
+        """
+        Test that records from several scanners all reach the sink through a small queue.
+        """
+        output = io.StringIO()
+        scanners = [SimulatedScanner(path) for path in self.paths] + [HardwareScanner(count=5)]
+        counts = asyncio.run(run_pipeline(scanners, FileSink(output), processor=MRZProcessor(log_errors=False),
+                                          workers=3, queue_size=4, batch_size=8))
+        self.assertEqual(counts, {"valid": 60, "failed": 5})
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        passport_numbers = {record["result"]["Passport Number"] for record in records if record["result"]}
+        self.assertEqual(len(records), 65)
+        self.assertEqual(len(passport_numbers), 60)
+
+    def test_store_sink(self):
+        """
+        Test that valid records are written to the store sink.
+        """
+        store = SQLiteStore(os.path.join(self.directory, "mrz.db"))
+        try:
+            counts = asyncio.run(run_pipeline([SimulatedScanner(self.paths[0])], StoreSink(store)))
+            self.assertEqual(counts["valid"], 20)
+            self.assertIsNotNone(store.retrieve("S0N000019"))
+        finally:
+            store.close()
+
+    def test_error_summary_flushed_at_end_of_run(self):
+        """
+        Test that the aggregated failures of a run are logged when it finishes.
+        """
+        processor = MRZProcessor(aggregator=ErrorAggregator(flush_interval=3600))
+        with self.assertLogs("MRTD", "ERROR") as logs:
+            asyncio.run(run_pipeline([HardwareScanner(count=3)], lambda results: None, processor=processor))
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("3 MRZ decode failures", logs.output[0])
+        processor.aggregator.close()
+
+    def test_failing_sink_stops_the_pipeline(self):
+        """
+        Test that a sink error cancels the scanners and is re-raised instead of hanging.
+        """
+        def sink(results):
+            raise RuntimeError("disk full")
+
+        async def run():
+            return await asyncio.wait_for(run_pipeline(
+                [HardwareScanner(count=50), SimulatedScanner(self.paths[0])], sink,
+                processor=MRZProcessor(log_errors=False), queue_size=2, batch_size=1), timeout=10)
+        with self.assertRaisesRegex(RuntimeError, "disk full"):
+            asyncio.run(run())
+
+    def test_dedup_sink_reports_repeats(self):
+        """
+        Test that a scanner replayed twice is reported as duplicates and still reaches the next sink.
+        """
+        output = io.StringIO()
+        sink = DedupSink(FileSink(output))
+        scanners = [SimulatedScanner(self.paths[0]), SimulatedScanner(self.paths[0], name="again")]
+        asyncio.run(run_pipeline(scanners, sink, processor=MRZProcessor(log_errors=False)))
+        self.assertEqual(len(output.getvalue().splitlines()), 40)
+        self.assertEqual(len(sink.findings), 20)
+        self.assertEqual({finding.kind for finding in sink.findings}, {"duplicate"})
+        self.assertEqual(sink.index.summary()["unique"], 20)
+
+    def test_simulated_scanner_rate(self):
+        """
+        Test that the simulated scanner paces its records at the configured rate.
+        """
+        async def replay():
+            queue = asyncio.Queue()
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            await SimulatedScanner(self.paths[0], rate=400).run(queue)
+            return queue.qsize(), loop.time() - start
+        size, elapsed = asyncio.run(replay())
+        self.assertEqual(size, 20)
+        self.assertGreaterEqual(elapsed, 19 / 400)
+
+if __name__ == '__main__':
+    unittest.main()
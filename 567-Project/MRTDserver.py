@@ -0,0 +1,176 @@
+import json
+import asyncio
+import argparse
+
+from MRTD import MRZProcessor, MRZError
+
+class MRZServer:
+    """
+    Line-delimited TCP or Unix-socket decode service. Each request line holds
+    MRZ line 1 and line 2 separated by a tab, and each response line is the
+    JSON decode result. Requests from all connections are grouped into
+    micro-batches of up to batch_size, waiting at most max_wait_ms for a
+    batch to fill, before they are handed to the decoder.
+    """
+    def __init__(self, processor=None, batch_size=64, max_wait_ms=2.0):
+        self.processor = processor or MRZProcessor()
+        self.batch_size = batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self._pending = None
+        self._batcher = None
+        self._server = None
+
+    async def start(self, host="127.0.0.1", port=0, path=None):
+        """
+        Start listening on a TCP port, or on a Unix socket when path is given.
+        Returns the address the server is bound to.
+        """
+        self._pending = asyncio.Queue()
+        self._batcher = asyncio.ensure_future(self._run_batches())
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path=path)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()
+
+    async def close(self):
+        """
+        Stop accepting connections, stop the batcher and flush any pending
+        error summary.
+        """
+        self._server.close()
+        await self._server.wait_closed()
+        self._batcher.cancel()
+        try:
+            await self._batcher
+        except asyncio.CancelledError:
+            pass
+        if self.processor.aggregator is not None:
+            self.processor.aggregator.flush()
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def _run_batches(self):
+        """
+        Collect queued requests into micro-batches and resolve their futures.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._pending.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._pending.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self.batches += 1
+            results = self.processor.decode_many(pair for pair, _ in batch)
+            for (_, future), result in zip(batch, results):
+                if not future.cancelled():
+                    future.set_result(result)
+
+    async def _handle(self, reader, writer):
+        """
+        Serve one connection. Requests are pipelined: responses are written in
+        request order as soon as their batch has been decoded.
+        """
+        loop = asyncio.get_running_loop()
+        responses = asyncio.Queue()
+
+        async def respond():
+            while True:
+                future = await responses.get()
+                if future is None:
+                    break
+                result, error = await future
+                writer.write(json.dumps({"result": result, "error": error}).encode() + b"\n")
+                if responses.empty():
+                    await writer.drain()
+
+        responder = asyncio.ensure_future(respond())
+        try:
+            async for line in reader:
+                future = loop.create_future()
+                fields = line.decode("ascii", "replace").rstrip("\r\n").split("\t")
+                if len(fields) != 2:
+                    future.set_result((None, MRZError.INVALID_FORMAT))
+                else:
+                    await self._pending.put((tuple(fields), future))
+                await responses.put(future)
+        finally:
+            await responses.put(None)
+            await responder
+            writer.close()
+
+class MRZClient:
+    """
+    Pipelined client for MRZServer: requests are written without waiting for
+    earlier responses, and responses are matched to requests by order.
+    """
+    def __init__(self):
+        self._reader = self._writer = None
+
+    async def connect(self, host="127.0.0.1", port=None, path=None):
+        if path is not None:
+            self._reader, self._writer = await asyncio.open_unix_connection(path)
+        else:
+            self._reader, self._writer = await asyncio.open_connection(host, port)
+
+    async def decode_many(self, pairs):
+        """
+        Send every (line1, line2) pair and return the list of (result, error)
+        responses in the same order.
+        """
+        pairs = list(pairs)
+
+        async def send():
+            for line1, line2 in pairs:
+                self._writer.write(f"{line1}\t{line2}\n".encode("ascii"))
+                await self._writer.drain()
+
+        sender = asyncio.ensure_future(send())
+        responses = []
+        for _ in pairs:
+            response = json.loads(await self._reader.readline())
+            responses.append((response["result"], response["error"]))
+        await sender
+        return responses
+
+    async def decode(self, line1, line2):
+        """
+        Decode a single pair, returning a (result, error) tuple.
+        """
+        return (await self.decode_many([(line1, line2)]))[0]
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+
+def main(argv=None):
+    """
+    Command-line entry point: python MRTDserver.py --port N
+    """
+    parser = argparse.ArgumentParser(description="Serve MRZ decoding over a local socket.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8567)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args(argv)
+
+    async def serve():
+        server = MRZServer(MRZProcessor(log_errors=False), args.batch_size, args.max_wait_ms)
+        address = await server.start(args.host, args.port, args.unix)
+        print(f"Serving MRZ decoding on {address}")
+        await server.serve_forever()
+
+    asyncio.run(serve())
+
+# Command-line usage (excluded from coverage)
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,77 @@
+import os
+import asyncio
+import tempfile
+import unittest
+from MRTD import MRZProcessor, MRZError
+from MRTDserver import MRZServer, MRZClient
+
+class TestMRZServer(unittest.TestCase):
+    def setUp(self):
+        processor = MRZProcessor()
+        self.pairs = [processor.encode_mrz({"Passport Number": "V%08d" % number}) for number in range(200)]
+
+    async def round_trip(self, path=None, clients=4):
+        server = MRZServer(MRZProcessor(log_errors=False), batch_size=32, max_wait_ms=5)
+        address = await server.start(port=0, path=path)
+        try:
+            async def run_client(pairs):
+                client = MRZClient()
+                await client.connect(port=None if path else address[1], path=path)
+                try:
+                    return await client.decode_many(pairs)
+                finally:
+                    await client.close()
+            results = await asyncio.gather(*(run_client(self.pairs[index::clients]) for index in range(clients)))
+            return results, server.batches
+        finally:
+            await server.close()
+
+    def test_pipelined_clients_get_ordered_results(self):
+        """
+        Test that concurrent pipelined clients get their results in request order.
+        """
+        results, batches = asyncio.run(self.round_trip())
+        for index, responses in enumerate(results):
+            expected = ["V%08d" % number for number in range(200)][index::4]
+            self.assertEqual([result["Passport Number"] for result, _ in responses], expected)
+        # Requests are grouped into micro-batches rather than decoded one by one
+        self.assertLess(batches, 200)
+
+    @unittest.skipUnless(hasattr(asyncio, "start_unix_server"), "Unix sockets are not available")
+    def test_unix_socket(self):
+        """
+        Test that the server can listen on a Unix socket.
+        """
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "mrz.sock")
+        try:
+            results, _ = asyncio.run(self.round_trip(path=path, clients=1))
+            self.assertEqual(len(results[0]), 200)
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+            os.rmdir(directory)
+
+    def test_errors_and_malformed_requests(self):
+        """
+        Test that decode errors and malformed request lines are reported per request.
+        """
+        async def run():
+            server = MRZServer(MRZProcessor(log_errors=False))
+            _, port = await server.start()
+            client = MRZClient()
+            await client.connect(port=port)
+            try:
+                missing = await client.decode("", "")
+                client._writer.write(b"not a pair\n")
+                malformed = await client._reader.readline()
+                return missing, malformed
+            finally:
+                await client.close()
+                await server.close()
+        missing, malformed = asyncio.run(run())
+        self.assertEqual(missing, (None, MRZError.MISSING_DATA))
+        self.assertIn(b'"invalid_format"', malformed)
+
+if __name__ == '__main__':
+    unittest.main()
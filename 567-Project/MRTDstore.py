@@ -0,0 +1,529 @@
+import sys
+import json
+import time
+import array
+import queue
+import bisect
+import datetime
+import sqlite3
+import threading
+import collections
+import itertools
+import contextlib
+
+from MRTD import FIELD_NAMES
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+# Column for each MRZ data field, in FIELD_NAMES order
+COLUMNS = ("document_type", "issuing_country", "name", "passport_number", "nationality",
+           "birth_date", "gender", "expiration_date", "personal_number")
+
+# Maximum number of passport numbers looked up by one SELECT ... IN statement
+LOOKUP_BATCH = 500
+
+# Fixed-width ColumnarStore columns: (column, index in FIELD_NAMES, width in bytes)
+FIXED_COLUMNS = (("document_type", 0, 2), ("issuing_country", 1, 3), ("passport_number", 3, 9),
+                 ("nationality", 4, 3), ("gender", 6, 1), ("personal_number", 8, 14))
+
+# Header line of a saved ColumnarStore file
+COLUMNAR_MAGIC = b"MRZCOLUMNS 1\n"
+
+class MRZStore:
+    """
+    Storage backend interface used by MRZProcessor.retrieve_from_database
+    and MRZProcessor.write_to_database.
+    """
+    def write(self, data):
+        """
+        Store one data dict, replacing any record with the same passport number.
+        """
+        self.write_many([data])
+
+    def write_many(self, records):
+        """
+        Store an iterable of data dicts.
+        """
+        raise NotImplementedError
+
+    def retrieve(self, passport_number):
+        """
+        Return the data dict for a passport number, or None if it is unknown.
+        """
+        return self.retrieve_many([passport_number])[0]
+
+    def retrieve_many(self, passport_numbers):
+        """
+        Return a list with the data dict (or None) for each passport number.
+        """
+        raise NotImplementedError
+
+    def retrieve_encoded(self, passport_number, encode):
+        """
+        Return the (line1, line2) produced by encode for a stored record,
+        or None if the passport number is unknown.
+        """
+        data = self.retrieve(passport_number)
+        return None if data is None else encode(data)
+
+    def close(self):
+        """
+        Release any resources held by the store.
+        """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class SQLiteStore(MRZStore):
+    """
+    SQLite-backed MRZ store indexed by passport number. Connections are kept
+    in a small pool and use WAL mode so that readers do not block the writer.
+    Bulk writes run in batched transactions.
+
+    A path of ":memory:" opens one private in-memory database shared by all
+    pooled connections through SQLite's shared cache. WAL does not apply to
+    memory databases; readers use read_uncommitted instead, so they are not
+    locked out by a concurrent writer but may see its uncommitted rows.
+    Shared-cache table locks fail at once rather than waiting out the busy
+    timeout, so writes to a memory database are serialized by the store.
+    """
+    _memory_databases = itertools.count()
+
+    _INSERT = "INSERT OR REPLACE INTO documents ({}) VALUES ({})".format(
+        ", ".join(COLUMNS), ", ".join("?" * len(COLUMNS)))
+    _SELECT = "SELECT {} FROM documents WHERE passport_number IN ({{}})".format(", ".join(COLUMNS))
+
+    def __init__(self, path, pool_size=4, batch_size=10000):
+        self.path = path
+        self.batch_size = batch_size
+        self._uri = None
+        if path == ":memory:":
+            self._uri = f"file:mrtd-store-{next(self._memory_databases)}-{id(self)}?mode=memory&cache=shared"
+        self._write_lock = threading.Lock() if self._uri is not None else contextlib.nullcontext()
+        self._pool = queue.LifoQueue()
+        self._all = []
+        for _ in range(pool_size):
+            connection = self._connect()
+            self._all.append(connection)
+            self._pool.put(connection)
+        with self._connection() as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS documents ({}, PRIMARY KEY (passport_number))".format(
+                ", ".join(f"{column} TEXT" for column in COLUMNS)))
+
+    def _connect(self):
+        if self._uri is not None:
+            connection = sqlite3.connect(self._uri, uri=True, check_same_thread=False, cached_statements=16)
+            connection.execute("PRAGMA read_uncommitted=1")
+            return connection
+        connection = sqlite3.connect(self.path, check_same_thread=False, cached_statements=16)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    @contextlib.contextmanager
+    def _connection(self):
+        """
+        Borrow a pooled connection for one transaction.
+        """
+        connection = self._pool.get()
+        try:
+            with connection:
+                yield connection
+        finally:
+            self._pool.put(connection)
+
+    def write_many(self, records):
+        """
+        Store an iterable of data dicts, committing once per batch_size records.
+        """
+        rows = (tuple(data.get(field) for field in FIELD_NAMES) for data in records)
+        while True:
+            batch = list(itertools.islice(rows, self.batch_size))
+            if not batch:
+                return
+            with self._write_lock, self._connection() as connection:
+                connection.executemany(self._INSERT, batch)
+
+    def retrieve_many(self, passport_numbers):
+        """
+        Look up passport numbers in batches, returning a list with the data
+        dict (or None) for each one in input order.
+        """
+        passport_numbers = list(passport_numbers)
+        found = {}
+        with self._connection() as connection:
+            for start in range(0, len(passport_numbers), LOOKUP_BATCH):
+                batch = passport_numbers[start:start + LOOKUP_BATCH]
+                # Full batches reuse one cached prepared statement
+                sql = self._SELECT.format(", ".join("?" * len(batch)))
+                for row in connection.execute(sql, batch):
+                    found[row[3]] = dict(zip(FIELD_NAMES, row))
+        return [found.get(passport_number) for passport_number in passport_numbers]
+
+    def close(self):
+        """
+        Close every pooled connection.
+        """
+        for connection in self._all:
+            connection.close()
+        self._all = []
+
+class CachedStore(MRZStore):
+    """
+    Bounded cache in front of another store, keyed by passport number.
+    Each entry holds the retrieved record and, once requested, its encoded
+    (line1, line2). Entries are evicted least recently used first, or when
+    older than ttl seconds, and writes invalidate the affected entries.
+    A write that lands while a record is being fetched from the backend
+    also stops that fetch's result from being cached.
+    """
+    def __init__(self, backend, max_entries=10000, ttl=None):
+        self.backend = backend
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = self.misses = self.evictions = 0
+        self._entries = collections.OrderedDict()
+        # [write generation, fetches in flight] per passport number being fetched
+        self._fetching = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, passport_number):
+        """
+        Return the live cache entry for a passport number, or None.
+        """
+        entry = self._entries.get(passport_number)
+        if entry is None:
+            self.misses += 1
+            return None
+        if self.ttl is not None and time.monotonic() - entry[2] > self.ttl:
+            del self._entries[passport_number]
+            self.evictions += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(passport_number)
+        self.hits += 1
+        return entry
+
+    def _store(self, passport_number, data, lines=None, inserted=None):
+        self._entries[passport_number] = [data, lines, time.monotonic() if inserted is None else inserted]
+        self._entries.move_to_end(passport_number)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _begin_fetch(self, passport_number):
+        """
+        Register a fetch that may cache its result, returning the write
+        generation it started at. Called with the lock held.
+        """
+        fetch = self._fetching.setdefault(passport_number, [0, 0])
+        fetch[1] += 1
+        return fetch[0]
+
+    def _end_fetch(self, passport_number, generation, data, lines=None, inserted=None):
+        """
+        Cache a fetched record unless it was written since the fetch began.
+        Called with the lock held.
+        """
+        fetch = self._fetching[passport_number]
+        fetch[1] -= 1
+        if not fetch[1]:
+            del self._fetching[passport_number]
+        if data is not None and fetch[0] == generation:
+            self._store(passport_number, data, lines, inserted)
+
+    def retrieve_many(self, passport_numbers):
+        """
+        Return cached records, fetching the missing ones from the backend in one call.
+        """
+        passport_numbers = list(passport_numbers)
+        results = [None] * len(passport_numbers)
+        missing = []
+        with self._lock:
+            for index, passport_number in enumerate(passport_numbers):
+                entry = self._lookup(passport_number)
+                if entry is None:
+                    missing.append((index, self._begin_fetch(passport_number)))
+                else:
+                    results[index] = entry[0]
+        if missing:
+            fetched = [None] * len(missing)
+            try:
+                fetched = self.backend.retrieve_many([passport_numbers[index] for index, _ in missing])
+            finally:
+                with self._lock:
+                    for (index, generation), data in zip(missing, fetched):
+                        results[index] = data
+                        self._end_fetch(passport_numbers[index], generation, data)
+        return results
+
+    def retrieve_encoded(self, passport_number, encode):
+        """
+        Return the cached (line1, line2) for a passport number, encoding and
+        caching it on first use. Adding the lines keeps the entry's original
+        insert time, so it still expires ttl seconds after it was fetched.
+        """
+        with self._lock:
+            entry = self._lookup(passport_number)
+            if entry is not None and entry[1] is not None:
+                return entry[1]
+            generation = self._begin_fetch(passport_number)
+        data = lines = None
+        try:
+            data = entry[0] if entry is not None else self.backend.retrieve(passport_number)
+            if data is not None:
+                lines = encode(data)
+        finally:
+            with self._lock:
+                self._end_fetch(passport_number, generation, data if lines is not None else None, lines,
+                                entry[2] if entry is not None else None)
+        return lines
+
+    def write_many(self, records):
+        """
+        Write through to the backend and invalidate the written passport
+        numbers, including any fetch of them still in flight.
+        """
+        records = list(records)
+        self.backend.write_many(records)
+        with self._lock:
+            for data in records:
+                passport_number = data.get("Passport Number")
+                self._entries.pop(passport_number, None)
+                fetch = self._fetching.get(passport_number)
+                if fetch is not None:
+                    fetch[0] += 1
+
+    def stats(self):
+        """
+        Return the cache size and hit, miss and eviction counters.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def close(self):
+        """
+        Drop the cached entries and close the backend.
+        """
+        with self._lock:
+            self._entries.clear()
+        self.backend.close()
+
+def pack_date(value, pivot):
+    """
+    Pack a YYMMDD date into a YYYYMMDD integer, placing two-digit years
+    below pivot in the 2000s and the others in the 1900s. Blank or
+    malformed dates pack to 0.
+    """
+    if not value or len(value) != 6 or not value.isdigit():
+        return 0
+    year = int(value[:2])
+    return (2000 + year if year < pivot else 1900 + year) * 10000 + int(value[2:])
+
+def _date_key(value, pivot):
+    """
+    Turn a query bound (a date, a YYYYMMDD integer or a YYMMDD string) into
+    a packed date.
+    """
+    if isinstance(value, datetime.date):
+        return value.year * 10000 + value.month * 100 + value.day
+    if isinstance(value, str):
+        return pack_date(value, pivot)
+    return value
+
+class ColumnarStore(MRZStore):
+    """
+    In-memory columnar MRZ store for large report queries. Codes, document
+    numbers and gender live in fixed-width byte arrays, birth and expiration
+    dates in arrays of packed YYYYMMDD integers, and each record is a row
+    number. Records are keyed by passport number like the other stores.
+    A nationality index and an expiration-date sort order are built on the
+    first query after a write, using NumPy when it is installed.
+    """
+    def __init__(self, birth_pivot=None, expiry_pivot=70):
+        # Birth dates cannot lie in the future, expiration dates mostly do
+        self.birth_pivot = birth_pivot if birth_pivot is not None else datetime.date.today().year % 100 + 1
+        self.expiry_pivot = expiry_pivot
+        self._columns = {column: bytearray() for column, _, _ in FIXED_COLUMNS}
+        self._birth = array.array("I")
+        self._expiry = array.array("I")
+        self._names = []
+        self._rows = {}
+        self._nationalities = None
+        self._expiry_order = None
+        self._expiry_keys = None
+
+    def __len__(self):
+        return len(self._names)
+
+    def write_many(self, records):
+        """
+        Store an iterable of data dicts or DecodedMRZ records, replacing the
+        row of any passport number that is already stored.
+        """
+        # Drop the indexes first, so rows stored before a failing record are still found
+        self._nationalities = self._expiry_order = self._expiry_keys = None
+        columns = [(self._columns[column], index, width) for column, index, width in FIXED_COLUMNS]
+        for record in records:
+            values = record if isinstance(record, tuple) else tuple(record.get(field) for field in FIELD_NAMES)
+            packed = []
+            for _, index, width in columns:
+                value = (values[index] or "").encode("ascii")
+                if len(value) > width:
+                    raise ValueError(f"{FIELD_NAMES[index]} {values[index]!r} is longer than {width} characters.")
+                packed.append(value.ljust(width, b"\0"))
+            birth = pack_date(values[5], self.birth_pivot)
+            expiry = pack_date(values[7], self.expiry_pivot)
+            row = self._rows.get(values[3])
+            if row is None:
+                self._rows[values[3]] = len(self._names)
+                for (column, _, _), value in zip(columns, packed):
+                    column += value
+                self._birth.append(birth)
+                self._expiry.append(expiry)
+                self._names.append(values[2] or "")
+            else:
+                for (column, _, width), value in zip(columns, packed):
+                    column[row * width:(row + 1) * width] = value
+                self._birth[row] = birth
+                self._expiry[row] = expiry
+                self._names[row] = values[2] or ""
+
+    def record(self, row):
+        """
+        Return the data dict stored in a row.
+        """
+        values = [None] * len(FIELD_NAMES)
+        for column, index, width in FIXED_COLUMNS:
+            values[index] = self._columns[column][row * width:(row + 1) * width].rstrip(b"\0").decode("ascii")
+        values[2] = self._names[row]
+        values[5] = "%06d" % (self._birth[row] % 1000000) if self._birth[row] else ""
+        values[7] = "%06d" % (self._expiry[row] % 1000000) if self._expiry[row] else ""
+        return dict(zip(FIELD_NAMES, values))
+
+    def records(self, rows):
+        """
+        Yield the data dict of each row number.
+        """
+        for row in rows:
+            yield self.record(row)
+
+    def retrieve_many(self, passport_numbers):
+        """
+        Return a list with the data dict (or None) for each passport number.
+        """
+        rows = self._rows
+        return [None if rows.get(number) is None else self.record(rows[number]) for number in passport_numbers]
+
+    def _build_indexes(self):
+        """
+        Build the nationality index and the expiration-date sort order.
+        """
+        nationalities = self._columns["nationality"]
+        if np is not None:
+            codes = np.frombuffer(nationalities, dtype="S3")
+            order = np.argsort(codes, kind="stable")
+            unique, starts = np.unique(codes[order], return_index=True)
+            self._nationalities = {code.decode("ascii"): rows
+                                   for code, rows in zip(unique, np.split(order, starts[1:]))}
+            expiry = np.frombuffer(self._expiry, dtype=np.uint32)
+            self._expiry_order = np.argsort(expiry, kind="stable")
+            self._expiry_keys = expiry[self._expiry_order]
+            del codes, expiry
+        else:
+            self._nationalities = {}
+            for row in range(len(self)):
+                code = nationalities[row * 3:row * 3 + 3].rstrip(b"\0").decode("ascii")
+                self._nationalities.setdefault(code, array.array("I")).append(row)
+            self._expiry_order = array.array("I", sorted(range(len(self)), key=self._expiry.__getitem__))
+            self._expiry_keys = array.array("I", (self._expiry[row] for row in self._expiry_order))
+
+    def query(self, nationality=None, expires_from=None, expires_to=None):
+        """
+        Return the row numbers matching a nationality and/or an inclusive
+        expiration-date range. Bounds are dates, YYYYMMDD integers or YYMMDD
+        strings. Rows come in expiration order when a range is given and in
+        insertion order otherwise.
+        """
+        if self._nationalities is None:
+            self._build_indexes()
+        empty = np.empty(0, dtype=np.intp) if np is not None else array.array("I")
+        if expires_from is None and expires_to is None:
+            if nationality is None:
+                return np.arange(len(self)) if np is not None else array.array("I", range(len(self)))
+            return self._nationalities.get(nationality, empty)
+
+        low = 0 if expires_from is None else _date_key(expires_from, self.expiry_pivot)
+        high = 99999999 if expires_to is None else _date_key(expires_to, self.expiry_pivot)
+        start = bisect.bisect_left(self._expiry_keys, low)
+        rows = self._expiry_order[start:bisect.bisect_right(self._expiry_keys, high, start)]
+        if nationality is None:
+            return rows
+        code = nationality.encode("ascii")
+        if np is not None:
+            codes = np.frombuffer(self._columns["nationality"], dtype="S3")
+            matches = rows[codes[rows] == code]
+            del codes
+            return matches
+        column = self._columns["nationality"]
+        return array.array("I", (row for row in rows if column[row * 3:row * 3 + 3].rstrip(b"\0") == code))
+
+    def count(self, nationality=None, expires_from=None, expires_to=None):
+        """
+        Return the number of rows matching query.
+        """
+        return len(self.query(nationality, expires_from, expires_to))
+
+    def save(self, path):
+        """
+        Write the columns to a file readable by ColumnarStore.load.
+        """
+        names = "\n".join(self._names).encode("utf-8")
+        blobs = [bytes(self._columns[column]) for column, _, _ in FIXED_COLUMNS]
+        blobs += [self._birth.tobytes(), self._expiry.tobytes(), names]
+        header = {"rows": len(self), "byteorder": sys.byteorder, "birth_pivot": self.birth_pivot,
+                  "expiry_pivot": self.expiry_pivot, "sizes": [len(blob) for blob in blobs]}
+        with open(path, "wb") as file:
+            file.write(COLUMNAR_MAGIC)
+            file.write(json.dumps(header).encode("ascii") + b"\n")
+            for blob in blobs:
+                file.write(blob)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a store written by save.
+        """
+        with open(path, "rb") as file:
+            if file.readline() != COLUMNAR_MAGIC:
+                raise ValueError(f"{path} is not a saved ColumnarStore.")
+            header = json.loads(file.readline())
+            blobs = [file.read(size) for size in header["sizes"]]
+        if any(len(blob) != size for blob, size in zip(blobs, header["sizes"])):
+            raise ValueError(f"{path} is truncated.")
+        store = cls(header["birth_pivot"], header["expiry_pivot"])
+        for (column, _, _), blob in zip(FIXED_COLUMNS, blobs):
+            store._columns[column] = bytearray(blob)
+        store._birth.frombytes(blobs[-3])
+        store._expiry.frombytes(blobs[-2])
+        if header["byteorder"] != sys.byteorder:
+            store._birth.byteswap()
+            store._expiry.byteswap()
+        store._names = blobs[-1].decode("utf-8").split("\n") if header["rows"] else []
+        passport_numbers = store._columns["passport_number"]
+        store._rows = {passport_numbers[row * 9:row * 9 + 9].rstrip(b"\0").decode("ascii"): row
+                       for row in range(header["rows"])}
+        return store
@@ -0,0 +1,315 @@
+import os
+import shutil
+import tempfile
+import datetime
+import threading
+import unittest
+import concurrent.futures
+from unittest.mock import patch
+import MRTDgen
+import MRTDstore
+from MRTD import MRZProcessor
+from MRTDstore import SQLiteStore, CachedStore, ColumnarStore
+
+class TestSQLiteStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = SQLiteStore(os.path.join(self.directory, "mrz.db"), batch_size=7)
+        self.processor = MRZProcessor(store=self.store)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.directory)
+
+    def record(self, passport_number):
+        return {
+            "Document Type": "P",
+            "Issuing Country": "TJK",
+            "Name": "COMBS<<ADDISON<JANE",
+            "Passport Number": passport_number,
+            "Nationality": "TJK",
+            "Date of Birth": "720916",
+            "Gender": "M",
+            "Expiration Date": "090507",
+            "Personal Number": "MI797251T"
+        }
+
+    def test_round_trip_through_processor(self):
+        """
+        Test that write_to_database and retrieve_from_database use the store.
+        """
+        self.processor.write_to_database(self.record("V855996J7"))
+        self.assertEqual(self.processor.retrieve_from_database("V855996J7"), self.record("V855996J7"))
+        self.assertIsNone(self.processor.retrieve_from_database("L898902C3"))
+
+    def test_write_many_and_retrieve_many(self):
+        """
+        Test bulk writes across several batches and ordered bulk lookups.
+        """
+        numbers = ["X%08d" % number for number in range(1200)]
+        self.store.write_many(self.record(number) for number in numbers)
+        lookup = numbers[::-1] + ["MISSING"]
+        results = self.store.retrieve_many(lookup)
+        self.assertEqual([result["Passport Number"] for result in results[:-1]], lookup[:-1])
+        self.assertIsNone(results[-1])
+
+    def test_write_replaces_existing_record(self):
+        """
+        Test that writing the same passport number again replaces the record.
+        """
+        self.store.write(self.record("V855996J7"))
+        updated = dict(self.record("V855996J7"), Name="COMBS<<ADDISON")
+        self.store.write(updated)
+        self.assertEqual(self.store.retrieve("V855996J7"), updated)
+
+    def test_wal_mode_and_concurrent_readers(self):
+        """
+        Test that the database uses WAL mode and serves reads from several threads.
+        """
+        self.store.write_many(self.record("X%08d" % number) for number in range(20))
+        with self.store._connection() as connection:
+            self.assertEqual(connection.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(self.store.retrieve, ["X%08d" % number for number in range(20)]))
+        self.assertTrue(all(result is not None for result in results))
+
+class TestMemorySQLiteStore(unittest.TestCase):
+    def test_pooled_connections_share_one_database(self):
+        """
+        Test that every pooled connection of a :memory: store sees the same tables and rows.
+        """
+        record = {"Document Type": "P", "Issuing Country": "TJK", "Name": "COMBS<<ADDISON<JANE",
+                  "Passport Number": "V855996J7", "Nationality": "TJK", "Date of Birth": "720916",
+                  "Gender": "M", "Expiration Date": "090507", "Personal Number": "MI797251T"}
+        with SQLiteStore(":memory:", pool_size=2) as store, SQLiteStore(":memory:", pool_size=2) as other:
+            with store._connection():
+                store.write(record)
+                self.assertEqual(store.retrieve("V855996J7"), record)
+            with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+                self.assertEqual(list(executor.map(store.retrieve, ["V855996J7"] * 4)), [record] * 4)
+            self.assertIsNone(other.retrieve("V855996J7"))
+
+    def test_concurrent_writers(self):
+        """
+        Test that writers on several pooled connections of a :memory: store all succeed.
+        """
+        records = [data for data, *_ in MRTDgen.generate(20000, seed=11)]
+        shards = [records[index::4] for index in range(4)]
+        with SQLiteStore(":memory:", batch_size=500) as store:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+                list(executor.map(store.write_many, shards))
+            self.assertEqual(store.retrieve_many(data["Passport Number"] for data in records), records)
+
+class TestCachedStore(TestSQLiteStore):
+    def setUp(self):
+        super().setUp()
+        self.cache = CachedStore(self.store, max_entries=3)
+        self.processor = MRZProcessor(store=self.cache)
+
+    def test_hits_and_misses(self):
+        """
+        Test that repeated lookups are served from the cache.
+        """
+        self.store.write(self.record("V855996J7"))
+        for _ in range(3):
+            self.assertEqual(self.processor.retrieve_from_database("V855996J7")["Passport Number"], "V855996J7")
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 1))
+
+    def test_encoded_lines_are_cached(self):
+        """
+        Test that encode_from_database encodes a record only once.
+        """
+        self.store.write(self.record("V855996J7"))
+        calls = []
+        def encode(data):
+            calls.append(data)
+            return self.processor.encode_mrz(data)
+        first = self.cache.retrieve_encoded("V855996J7", encode)
+        second = self.cache.retrieve_encoded("V855996J7", encode)
+        self.assertEqual(first, second)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.processor.encode_from_database("V855996J7"), first)
+        self.assertIsNone(self.processor.encode_from_database("UNKNOWN"))
+
+    def test_lru_eviction(self):
+        """
+        Test that the least recently used entry is evicted when the cache is full.
+        """
+        numbers = ["X%08d" % number for number in range(4)]
+        self.store.write_many(self.record(number) for number in numbers)
+        self.cache.retrieve_many(numbers[:3])
+        self.cache.retrieve(numbers[0])
+        self.cache.retrieve(numbers[3])
+        self.assertEqual(list(self.cache._entries), [numbers[2], numbers[0], numbers[3]])
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_ttl_expiry(self):
+        """
+        Test that entries older than the TTL are fetched again.
+        """
+        self.cache.ttl = -1  # every entry is already expired
+        self.store.write(self.record("V855996J7"))
+        self.cache.retrieve("V855996J7")
+        self.cache.retrieve("V855996J7")
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (0, 2, 1))
+
+    def test_write_invalidates(self):
+        """
+        Test that write_to_database invalidates the cached record.
+        """
+        self.processor.write_to_database(self.record("V855996J7"))
+        self.processor.retrieve_from_database("V855996J7")
+        updated = dict(self.record("V855996J7"), Name="COMBS<<ADDISON")
+        self.processor.write_to_database(updated)
+        self.assertEqual(self.processor.retrieve_from_database("V855996J7"), updated)
+
+    def test_write_during_fetch_is_not_overwritten(self):
+        """
+        Test that a record fetched before a concurrent write is not cached over it.
+        """
+        self.store.write(dict(self.record("V855996J7"), Name="OLD"))
+        fetching, release = threading.Event(), threading.Event()
+        retrieve_many = self.store.retrieve_many
+
+        def slow_retrieve_many(passport_numbers):
+            results = retrieve_many(passport_numbers)
+            fetching.set()
+            release.wait(5)
+            return results
+
+        with patch.object(self.store, "retrieve_many", slow_retrieve_many):
+            reader = threading.Thread(target=self.cache.retrieve, args=("V855996J7",))
+            reader.start()
+            fetching.wait(5)
+            self.cache.write(dict(self.record("V855996J7"), Name="NEW"))
+            release.set()
+            reader.join()
+        self.assertEqual(self.cache.retrieve("V855996J7")["Name"], "NEW")
+        self.assertEqual(self.cache._fetching, {})
+
+    def test_encoding_keeps_insert_time(self):
+        """
+        Test that caching the encoded lines does not extend the entry's TTL.
+        """
+        self.store.write(self.record("V855996J7"))
+        self.cache.retrieve("V855996J7")
+        self.cache._entries["V855996J7"][2] -= 100
+        inserted = self.cache._entries["V855996J7"][2]
+        self.cache.retrieve_encoded("V855996J7", self.processor.encode_mrz)
+        self.assertEqual(self.cache._entries["V855996J7"][2], inserted)
+        self.assertIsNotNone(self.cache._entries["V855996J7"][1])
+
+class TestColumnarStore(unittest.TestCase):
+    def setUp(self):
+        self.store = ColumnarStore(birth_pivot=27)
+        self.records = [data for data, *_ in MRTDgen.generate(500, seed=8)]
+        self.store.write_many(self.records)
+
+    def expected(self, nationality=None, low=0, high=99999999):
+        return sorted(data["Passport Number"] for data in self.records
+                      if nationality in (None, data["Nationality"])
+                      and low <= MRTDstore.pack_date(data["Expiration Date"], 70) <= high)
+
+    def found(self, rows):
+        return sorted(data["Passport Number"] for data in self.store.records(rows))
+
+    def test_round_trip_and_replace(self):
+        """
+        Test that records come back unchanged and that rewriting a passport number replaces its row.
+        """
+        processor = MRZProcessor(store=self.store)
+        self.assertEqual(self.store.retrieve_many(data["Passport Number"] for data in self.records), self.records)
+        updated = dict(self.records[3], Nationality="TJK", Name="COMBS<<ADDISON")
+        processor.write_to_database(updated)
+        self.assertEqual(len(self.store), 500)
+        self.assertEqual(processor.retrieve_from_database(updated["Passport Number"]), updated)
+        self.assertIn(3, list(self.store.query("TJK")))
+        self.assertIsNone(self.store.retrieve("MISSING"))
+
+    def test_decoded_records_and_packed_dates(self):
+        """
+        Test that DecodedMRZ records can be written and dates are packed with their century.
+        """
+        store = ColumnarStore(birth_pivot=27)
+        processor = MRZProcessor(log_errors=False)
+        _, line1, line2, _ = next(MRTDgen.generate(1, seed=8))
+        store.write_many(result for result, _ in processor.decode_many([(line1, line2)], as_record=True))
+        self.assertEqual(store.retrieve(self.records[0]["Passport Number"])["Date of Birth"],
+                         self.records[0]["Date of Birth"])
+        self.assertEqual(MRTDstore.pack_date("720916", 27), 19720916)
+        self.assertEqual(MRTDstore.pack_date("090507", 27), 20090507)
+        self.assertEqual(MRTDstore.pack_date("<<<<<<", 27), 0)
+        with self.assertRaises(ValueError):
+            store.write(dict(self.records[0], Nationality="TOOLONG"))
+
+    def test_failed_write_keeps_indexes_current(self):
+        """
+        Test that rows stored before a record is rejected show up in queries.
+        """
+        self.assertEqual(self.store.count("ZZZ"), 0)
+        with self.assertRaises(ValueError):
+            self.store.write_many([dict(self.records[0], **{"Passport Number": "Z1", "Nationality": "ZZZ"}),
+                                   dict(self.records[1], **{"Passport Number": "TOOLONG123"})])
+        self.assertEqual(len(self.store), 501)
+        self.assertEqual(self.store.count("ZZZ"), 1)
+
+    def test_queries_match_full_scan(self):
+        """
+        Test nationality, expiration range and combined queries against a full scan.
+        """
+        self.assertEqual(self.found(self.store.query("TJK")), self.expected("TJK"))
+        self.assertEqual(self.found(self.store.query(expires_from=20250101, expires_to="271231")),
+                         self.expected(low=20250101, high=20271231))
+        rows = self.store.query("USA", datetime.date(2030, 1, 1))
+        self.assertEqual(self.found(rows), self.expected("USA", low=20300101))
+        keys = [self.store._expiry[row] for row in rows]
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(self.store.count(), 500)
+        self.assertEqual(self.store.count("XXX"), 0)
+
+    def test_queries_without_numpy(self):
+        """
+        Test that the standard library index gives the same answers.
+        """
+        with patch("MRTDstore.np", None):
+            store = ColumnarStore(birth_pivot=27)
+            store.write_many(self.records)
+            self.assertEqual(self.found(store.query("TJK", "250101", "301231")),
+                             self.expected("TJK", 20250101, 20301231))
+            self.assertEqual(store.count("DEU"), len(self.expected("DEU")))
+            self.assertEqual(store.count(), 500)
+
+    def test_save_and_load(self):
+        """
+        Test that a saved store loads with the same records and indexes.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "records.mrzc")
+            self.store.save(path)
+            loaded = ColumnarStore.load(path)
+            with open(path, "r+b") as file:
+                file.truncate(os.path.getsize(path) - 1)
+            with self.assertRaises(ValueError):
+                ColumnarStore.load(path)
+        self.assertEqual(len(loaded), 500)
+        self.assertEqual(loaded.retrieve_many(data["Passport Number"] for data in self.records), self.records)
+        self.assertEqual(self.found(loaded.query("FRA", 20300101)), self.expected("FRA", low=20300101))
+
+    def test_sparse_record_round_trip(self):
+        """
+        Test that a record with only a passport number is stored, saved and loaded with blank fields.
+        """
+        store = ColumnarStore(birth_pivot=27)
+        store.write({"Passport Number": "X1"})
+        expected = dict.fromkeys(MRTDstore.FIELD_NAMES, "")
+        expected["Passport Number"] = "X1"
+        self.assertEqual(store.retrieve("X1"), expected)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "sparse.mrzc")
+            store.save(path)
+            self.assertEqual(ColumnarStore.load(path).retrieve("X1"), expected)
+
+if __name__ == '__main__':
+    unittest.main()
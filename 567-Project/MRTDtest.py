@@ -1,6 +1,13 @@
+import gc
+import os
+import sys
+import tempfile
 import unittest
+import weakref
+import subprocess
 from unittest.mock import patch, MagicMock
-from MRTD import MRZProcessor
+import MRTD
+from MRTD import MRZProcessor, MRZError, DecodedMRZ
 
 class TestMRZProcessor(unittest.TestCase):
     def setUp(self):
@@ -187,5 +194,378 @@ class TestMRZProcessor(unittest.TestCase):
         check_digit = self.processor.calculate_check_digit("")
         self.assertEqual(check_digit, '0')
 
+    def test_decode_many(self):
+        """
+        Test that decode_many lazily yields a result and error code per record.
+        """
+        line1, line2 = self.processor.encode_mrz({"Passport Number": "V855996J7"})
+        pairs = [(line1, line2), ("", ""), (line1, line2[:-1] + '9')]
+        results = self.processor.decode_many(iter(pairs))
+        decoded, error = next(results)
+        self.assertIsNone(error)
+        self.assertEqual(decoded["Passport Number"], "V855996J7")
+        self.assertEqual(next(results), (None, MRZError.MISSING_DATA))
+        self.assertEqual(next(results), (None, MRZError.PERSONAL_NUMBER))
+        self.assertEqual(list(results), [])
+
+    def test_encode_many(self):
+        """
+        Test that encode_many yields the same lines as encode_mrz.
+        """
+        records = [{"Passport Number": "V855996J7"}, {"Passport Number": "L898902C3"}]
+        expected = [self.processor.encode_mrz(data) for data in records]
+        self.assertEqual(list(self.processor.encode_many(records)), expected)
+
+    def test_calculate_check_digit_matches_single_digit_table(self):
+        """
+        Test that the chunked Damm tables agree with a digit-by-digit walk of DAMM_TABLE.
+        """
+        for field in ["", "7", "12", "123", "1234", "V855996J7", "0905071MI797251T<<<<<", "999999999999"]:
+            interim = 0
+            for char in field:
+                if char.isdigit():
+                    interim = MRTD.DAMM_TABLE[interim][int(char)]
+            self.assertEqual(self.processor.calculate_check_digit(field), str(interim))
+
+    def test_damm_state_resumes_from_interim_state(self):
+        """
+        Test that damm_state can continue from a previous interim state.
+        """
+        self.assertEqual(MRTD.damm_state("789", MRTD.damm_state("123456")), MRTD.damm_state("123456789"))
+
+    def test_line2_check_digits_single_pass(self):
+        """
+        Test that the single-pass scanner matches checking each field separately.
+        """
+        fields = ("V855996J7", "720916", "090507", "MI797251T")
+        expected = tuple(self.processor.calculate_check_digit(field) for field in fields[:3])
+        expected += (self.processor.calculate_check_digit(''.join(fields)),)
+        self.assertEqual(MRTD.line2_check_digits(*fields), expected)
+
+    def test_decode_mrz_invalid_birth_check_digit(self):
+        """
+        Test decode_mrz reports the first failing field when a middle check digit is wrong.
+        """
+        line1, line2 = self.processor.encode_mrz({"Passport Number": "V855996J7"})
+        wrong = str((int(line2[19]) + 1) % 10)
+        self.processor.scan_mrz(line1, line2[:19] + wrong + line2[20:])
+        self.assertEqual(self.processor.decode_mrz(), "Check digit validation failed for birth date.")
+
+    def test_decode_mrz_as_record(self):
+        """
+        Test that decode_mrz can return a compact DecodedMRZ record.
+        """
+        self.processor.scan_mrz(*self.processor.encode_mrz({"Passport Number": "L898902C3"}))
+        record = self.processor.decode_mrz(as_record=True)
+        self.assertIsInstance(record, DecodedMRZ)
+        self.assertEqual(record.passport_number, "L898902C3")
+        self.assertEqual(record.as_dict(), self.processor.decode_mrz())
+        self.assertFalse(hasattr(record, "__dict__"))
+
+    def test_decode_mrz_as_record_error(self):
+        """
+        Test that decode_mrz returns an MRZError when records are requested.
+        """
+        self.processor.scan_mrz("INVALID_LINE1", "INVALID_LINE2")
+        error = self.processor.decode_mrz(as_record=True)
+        self.assertIs(error, MRZError.INVALID_FORMAT)
+        self.assertEqual(error.message, "Error: Invalid MRZ data format.")
+
+    def test_decode_many_as_record(self):
+        """
+        Test that decode_many yields DecodedMRZ records when requested.
+        """
+        pairs = [self.processor.encode_mrz({"Passport Number": "V855996J7"})]
+        [(record, error)] = self.processor.decode_many(pairs, as_record=True)
+        self.assertIsNone(error)
+        self.assertEqual(record.passport_number, "V855996J7")
+
+    def test_decode_is_stateless(self):
+        """
+        Test that decode works on its arguments and leaves the scanned lines alone.
+        """
+        line1, line2 = self.processor.encode({"Passport Number": "V855996J7"})
+        self.assertEqual(self.processor.decode(line1, line2)["Passport Number"], "V855996J7")
+        self.assertEqual(self.processor.decode("", ""), "Error: MRZ data is missing.")
+        self.assertEqual((self.processor.line1, self.processor.line2), ("", ""))
+
+class TestImports(unittest.TestCase):
+    def test_decoding_loads_no_optional_features(self):
+        """
+        Test that importing MRTD and decoding do not load NumPy, the profiler, the OCR search or the file tools.
+        """
+        script = ("import sys, MRTD\n"
+                  "processor = MRTD.MRZProcessor(log_errors=False)\n"
+                  "processor.decode(*processor.encode_mrz({}))\n"
+                  "print(' '.join(sorted(set(sys.modules) & {'numpy', 'cProfile', 'mmap', 'argparse',\n"
+                  "    'multiprocessing', 'MRTDbatch', 'MRTDocr', 'MRTDinstrument', 'MRTDfile'})))\n")
+        completed = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True,
+                                   cwd=os.path.dirname(os.path.abspath(MRTD.__file__)), timeout=60)
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+        self.assertEqual(completed.stdout.strip(), "")
+
+class TestMRZService(unittest.TestCase):
+    def test_concurrent_submissions(self):
+        """
+        Test that concurrent decode and encode submissions resolve to the right results.
+        """
+        passport_numbers = ["V%08d" % number for number in range(50)]
+        with MRTD.MRZService(max_workers=4) as service:
+            encoded = [service.submit_encode({"Passport Number": number}) for number in passport_numbers]
+            decoded = [service.submit_decode(*future.result(), as_record=True) for future in encoded]
+            results = [future.result().passport_number for future in decoded]
+        self.assertEqual(results, passport_numbers)
+
+class TestLogging(unittest.TestCase):
+    def setUp(self):
+        self.processor = MRZProcessor()
+        line1, line2 = self.processor.encode_mrz({"Passport Number": "V855996J7"})
+        self.bad_pair = (line1, line2[:-1] + ('9' if line2[-1] != '9' else '8'))
+
+    def test_mismatch_is_logged(self):
+        """
+        Test that check digit mismatches are logged on the MRTD logger.
+        """
+        with self.assertLogs("MRTD", "ERROR") as logs:
+            self.processor.decode(*self.bad_pair)
+        self.assertIn("Mismatch in personal number field on line 2.", logs.output[0])
+
+    def test_logging_can_be_disabled(self):
+        """
+        Test that a processor created with log_errors=False does not log.
+        """
+        processor = MRZProcessor(log_errors=False)
+        with self.assertLogs("MRTD", "ERROR") as logs:
+            processor.decode(*self.bad_pair)
+            processor.decode("", "")
+            MRTD.logger.error("sentinel")
+        self.assertEqual(logs.output, ["ERROR:MRTD:sentinel"])
+
+    def test_configure_logging_writes_file(self):
+        """
+        Test that queued log records reach the file once the listener is stopped.
+        """
+        handle, path = tempfile.mkstemp(suffix=".log")
+        os.close(handle)
+        try:
+            MRTD.configure_logging(path)
+            self.processor.decode("", "")
+            MRTD.stop_logging()
+            with open(path) as file:
+                self.assertIn("MRZ data is missing.", file.read())
+        finally:
+            MRTD.stop_logging()
+            os.remove(path)
+
+class TestErrorAggregator(unittest.TestCase):
+    def test_counts_and_bounded_sample(self):
+        """
+        Test that failures are counted by error type and sampled into a bounded reservoir.
+        """
+        aggregator = MRTD.ErrorAggregator(sample_size=5, seed=1)
+        processor = MRZProcessor(aggregator=aggregator)
+        line1, line2 = processor.encode_mrz({"Passport Number": "V855996J7"})
+        bad_line2 = line2[:-1] + ('9' if line2[-1] != '9' else '8')
+        with self.assertLogs("MRTD", "ERROR") as logs:
+            for _ in range(100):
+                processor.decode(line1, bad_line2)
+                processor.decode("", "")
+            MRTD.logger.error("sentinel")
+        self.assertEqual(logs.output, ["ERROR:MRTD:sentinel"])
+        summary = aggregator.summary()
+        self.assertEqual(summary["total"], 200)
+        self.assertEqual(summary["counts"], {"personal_number": 100, "missing_data": 100})
+        self.assertEqual(len(summary["samples"]), 5)
+
+    def test_flush_logs_summary_and_resets(self):
+        """
+        Test that flush logs one summary line and starts a new period.
+        """
+        aggregator = MRTD.ErrorAggregator()
+        aggregator.record(MRZError.BIRTH_DATE, "line1", "line2")
+        with self.assertLogs("MRTD", "ERROR") as logs:
+            summary = aggregator.flush()
+        self.assertEqual(summary["counts"], {"birth_date": 1})
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("1 MRZ decode failures: birth_date=1", logs.output[0])
+        self.assertEqual(aggregator.summary()["total"], 0)
+
+    def test_periodic_flush(self):
+        """
+        Test that a zero flush interval flushes on every recorded failure.
+        """
+        aggregator = MRTD.ErrorAggregator(flush_interval=0)
+        with self.assertLogs("MRTD", "ERROR") as logs:
+            aggregator.record(MRZError.MISSING_DATA, "", "")
+            aggregator.record(MRZError.MISSING_DATA, "", "")
+        self.assertEqual(len(logs.output), 2)
+
+    def test_close_flushes_pending_summary(self):
+        """
+        Test that leaving the aggregator's context logs the failures of the last period.
+        """
+        with self.assertLogs("MRTD", "ERROR") as logs:
+            with MRTD.ErrorAggregator() as aggregator:
+                aggregator.record(MRZError.BIRTH_DATE, "", "")
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("birth_date=1", logs.output[0])
+        self.assertEqual(aggregator.summary()["total"], 0)
+
+    def test_pending_summary_is_logged_at_exit(self):
+        """
+        Test that failures recorded after the last flush are logged when the interpreter exits.
+        """
+        script = ("import logging, sys, MRTD\n"
+                  "MRTD.logger.addHandler(logging.StreamHandler(sys.stdout))\n"
+                  "aggregator = MRTD.ErrorAggregator(flush_interval=3600)\n"
+                  "aggregator.record(MRTD.MRZError.MISSING_DATA, '', '')\n")
+        completed = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True,
+                                   cwd=os.path.dirname(os.path.abspath(MRTD.__file__)), timeout=60)
+        self.assertIn("1 MRZ decode failures: missing_data=1", completed.stdout)
+
+    def test_dropped_aggregators_are_collected(self):
+        """
+        Test that the exit-time flush does not keep aggregators alive.
+        """
+        references = []
+        for _ in range(3):
+            aggregator = MRTD.ErrorAggregator()
+            aggregator.record(MRZError.MISSING_DATA, "", "")
+            references.append(weakref.ref(aggregator))
+            with self.assertLogs("MRTD", "ERROR"):
+                aggregator.close()
+        references.append(weakref.ref(MRTD.ErrorAggregator()))
+        del aggregator
+        gc.collect()
+        self.assertEqual([reference() for reference in references], [None] * 4)
+
+class TestValidateMRZ(unittest.TestCase):
+    def setUp(self):
+        self.processor = MRZProcessor()
+        self.line1, self.line2 = self.processor.encode_mrz({"Passport Number": "V855996J7"})
+
+    def corrupt(self, position):
+        digit = str((int(self.line2[position]) + 1) % 10)
+        return self.line2[:position] + digit + self.line2[position + 1:]
+
+    def test_valid(self):
+        """
+        Test that a valid MRZ passes the validate-only path.
+        """
+        self.assertIs(self.processor.validate_mrz(self.line1, self.line2), True)
+        self.assertIs(self.processor.validate_mrz(self.line1, self.line2 + "<"), True)
+
+    def test_first_failing_check_digit(self):
+        """
+        Test that each wrong check digit is reported with its own error.
+        """
+        for position, error in [(9, MRZError.PASSPORT_NUMBER), (19, MRZError.BIRTH_DATE),
+                                (27, MRZError.EXPIRATION_DATE), (42, MRZError.PERSONAL_NUMBER)]:
+            result = self.processor.validate_mrz(self.line1, self.corrupt(position))
+            self.assertIs(result, error)
+            self.assertIsNot(result, True)
+
+    def test_errors_stay_truthy(self):
+        """
+        Test that errors returned in (result, error) tuples are truthy, as they have always been.
+        """
+        _, error = next(self.processor.decode_many([("", "")]))
+        self.assertTrue(error)
+        self.assertTrue(MRZError.BIRTH_DATE)
+        self.assertEqual(bool(MRZError.MISSING_DATA), bool("missing_data"))
+
+    def test_length_and_character_set(self):
+        """
+        Test that bad lengths and characters fail before any check digit work.
+        """
+        self.assertIs(self.processor.validate_mrz("", self.line2), MRZError.MISSING_DATA)
+        self.assertIs(self.processor.validate_mrz("INVALID_LINE1", "INVALID_LINE2"), MRZError.INVALID_FORMAT)
+        self.assertIs(self.processor.validate_mrz(self.line1.lower(), self.line2), MRZError.INVALID_FORMAT)
+
+    def test_agrees_with_decode(self):
+        """
+        Test that validate_mrz and decode agree on a valid and an invalid record.
+        """
+        for line2 in (self.line2, self.corrupt(19)):
+            result = self.processor.decode(self.line1, line2, as_record=True)
+            expected = True if isinstance(result, DecodedMRZ) else result
+            self.assertIs(self.processor.validate_mrz(self.line1, line2), expected)
+
+def check_digit(*fields):
+    return MRTD.DIGITS[MRTD.damm_state(''.join(fields))]
+
+class TestFormats(unittest.TestCase):
+    def setUp(self):
+        self.processor = MRZProcessor(log_errors=False)
+        number, birth, expiry = "D23145890", "740812", "120415"
+        optional = "<" * 7
+        self.td2 = (
+            "I<UTOERIKSSON<<ANNA<MARIA".ljust(36, "<"),
+            number + check_digit(number) + "UTO" + birth + check_digit(birth) + "F" + expiry + check_digit(expiry)
+            + optional + check_digit(number, birth, expiry, optional),
+        )
+        optional1, optional2 = "1234567".ljust(15, "<"), "<" * 11
+        self.td1 = (
+            "I<UTO" + number + check_digit(number) + optional1,
+            birth + check_digit(birth) + "F" + expiry + check_digit(expiry) + "UTO" + optional2
+            + check_digit(number, optional1, birth, expiry, optional2),
+            "ERIKSSON<<ANNA<MARIA".ljust(30, "<"),
+        )
+
+    def test_detect_format(self):
+        """
+        Test that the layout is detected from the line count and lengths.
+        """
+        td3 = self.processor.encode_mrz({})
+        self.assertIs(MRTD.detect_format(td3), MRTD.TD3)
+        self.assertIs(MRTD.detect_format(self.td2), MRTD.TD2)
+        self.assertIs(MRTD.detect_format(self.td1), MRTD.TD1)
+        self.assertIsNone(MRTD.detect_format(("P<UTO", "L898902C3")))
+
+    def test_decode_td2(self):
+        """
+        Test decoding a TD2 document.
+        """
+        record = self.processor.decode_lines(self.td2, as_record=True)
+        self.assertEqual(record, DecodedMRZ("I", "UTO", "ERIKSSON ANNA MARIA", "D23145890", "UTO",
+                                            "740812", "F", "120415", ""))
+
+    def test_decode_td1(self):
+        """
+        Test decoding a three-line TD1 identity card.
+        """
+        result = self.processor.decode_lines(self.td1)
+        self.assertEqual(result["Name"], "ERIKSSON ANNA MARIA")
+        self.assertEqual(result["Passport Number"], "D23145890")
+        self.assertEqual(result["Personal Number"], "1234567")
+        self.assertEqual(result["Expiration Date"], "120415")
+
+    def test_td1_check_digit_errors(self):
+        """
+        Test that TD1 check digit mismatches map to the matching errors.
+        """
+        line1, line2, line3 = self.td1
+        bad_number = line1[:14] + str((int(line1[14]) + 1) % 10) + line1[15:]
+        self.assertIs(self.processor.decode_lines((bad_number, line2, line3), as_record=True),
+                      MRZError.PASSPORT_NUMBER)
+        bad_composite = line2[:29] + str((int(line2[29]) + 1) % 10)
+        self.assertIs(self.processor.decode_lines((line1, bad_composite, line3), as_record=True),
+                      MRZError.PERSONAL_NUMBER)
+
+    def test_decode_lines_td3_matches_decode(self):
+        """
+        Test that decode_lines handles TD3 lines like decode.
+        """
+        lines = self.processor.encode_mrz({"Passport Number": "V855996J7"})
+        self.assertEqual(self.processor.decode_lines(lines), self.processor.decode(*lines))
+
+    def test_decode_lines_unknown_format(self):
+        """
+        Test that unknown layouts and missing lines are reported.
+        """
+        self.assertEqual(self.processor.decode_lines(("P<UTO", "L898902C3")), "Error: Invalid MRZ data format.")
+        self.assertEqual(self.processor.decode_lines((self.td1[0], "", self.td1[2])), "Error: MRZ data is missing.")
+        self.assertEqual(self.processor.decode_lines(()), "Error: MRZ data is missing.")
+
 if __name__ == '__main__':
     unittest.main()
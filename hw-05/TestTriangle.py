@@ -5,8 +5,12 @@ The primary goal of this file is to demonstrate a simple unittest implementation
 @author: jrr
 @author: rk
 """
+import os
+import itertools
+import tempfile
 import unittest
-from triangle import classify_triangle
+import triangle
+from triangle import classify_triangle, classify_triangles, LABELS
 # This code implements the unit test functionality
 # https://docs.python.org/3/library/unittest.html has a nice description of the framework
 
@@ -59,6 +63,76 @@ class TestTriangles(unittest.TestCase):
         self.assertEqual(classify_triangle(1,1,2),'NotATriangle')
 
 
+@unittest.skipIf(triangle.np is None, 'NumPy is not installed')
+class TestClassifyTriangles(unittest.TestCase):
+    # classify_triangles must agree with classify_triangle everywhere
+
+    def assertMatchesScalar(self, triples, codes):
+        self.assertEqual([LABELS[code] for code in codes], [classify_triangle(*triple) for triple in triples])
+
+    def testMatchesScalarOnGrid(self):
+        sides = list(range(-1, 30)) + list(range(195, 203))
+        triples = list(itertools.product(sides, repeat=3))
+        codes = classify_triangles(triangle.np.array(triples))
+        self.assertEqual(codes.dtype, triangle.np.uint8)
+        self.assertMatchesScalar(triples, codes)
+
+    def testSeparateArraysBroadcast(self):
+        np = triangle.np
+        codes = classify_triangles(np.array([3, 5, 4], dtype=np.uint8), np.array([4, 3, 4]), 5)
+        self.assertEqual([LABELS[code] for code in codes], ['Right', 'Isosceles', 'Isosceles'])
+
+    def testNonIntegerSides(self):
+        triples = [(3.0, 4, 5), (1.1, 2, 3)]
+        self.assertMatchesScalar(triples, classify_triangles(triangle.np.array(triples)))
+        triples = [(3, 4, 5), (3, 4.0, 5), ('a', 2, 2), (2 ** 70, 2, 2)]
+        self.assertMatchesScalar(triples, classify_triangles(triangle.np.array(triples, dtype=object)))
+
+
+class TestLookupTable(unittest.TestCase):
+    # Answers from the precomputed table must match computed answers
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'triangle_table.bin')
+        triangle.build_table(self.path)
+
+    def tearDown(self):
+        triangle.load_table()
+        self.directory.cleanup()
+
+    def testTableMatchesComputation(self):
+        sides = list(range(-1, 25)) + list(range(160, 203, 7)) + [1.5, 'a']
+        triples = list(itertools.product(sides, repeat=3))
+        triangle.load_table(os.path.join(self.directory.name, 'missing.bin'))
+        computed = [classify_triangle(*triple) for triple in triples]
+        self.assertTrue(triangle.load_table(self.path))
+        self.assertEqual([classify_triangle(*triple) for triple in triples], computed)
+        self.assertEqual(os.path.getsize(self.path), triangle.TABLE_SIZE + 1)
+
+    @unittest.skipIf(triangle.np is None, 'NumPy is not installed')
+    def testBatchTableMatchesComputation(self):
+        triples = triangle.np.indices((203, 203, 3)).reshape(3, -1).T - 1
+        triangle.load_table(os.path.join(self.directory.name, 'missing.bin'))
+        computed = classify_triangles(triples)
+        self.assertTrue(triangle.load_table(self.path))
+        self.assertTrue((classify_triangles(triples) == computed).all())
+
+    def testMalformedTableFallsBack(self):
+        with open(self.path, 'r+b') as file:
+            file.truncate(100)
+        self.assertFalse(triangle.load_table(self.path))
+        self.assertIsNone(triangle._TABLE)
+        self.assertEqual(classify_triangle(3, 4, 5), 'Right')
+
+    def testOutdatedTableFallsBack(self):
+        with open(self.path, 'r+b') as file:
+            file.seek(triangle.TABLE_SIZE)
+            file.write(bytes([triangle.TABLE_VERSION - 1]))
+        self.assertFalse(triangle.load_table(self.path))
+        self.assertIsNone(triangle._TABLE)
+        self.assertEqual(classify_triangle(2, 2, 3), 'Isosceles')
+
 
 if __name__ == '__main__':
     print('Running unit tests')
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the shared triangle classification engine.
+"""
+import io
+import os
+import itertools
+import importlib.util
+import tempfile
+import unittest
+from unittest.mock import patch
+import triangle_engine
+from triangle import classify_triangle
+from triangle_engine import TriangleEngine, classify_file, main
+
+# Float semantics and labels of hw-01/triangle_classifier.py
+HW01 = {'integer': False, 'max_side': None, 'labels': 'descriptive'}
+HW01_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'hw-01', 'triangle_classifier.py')
+
+
+def load_hw01():
+    spec = importlib.util.spec_from_file_location('hw01_triangle_classifier', HW01_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestTriangleEngine(unittest.TestCase):
+    # The default engine must behave like classify_triangle
+
+    def testMatchesHw05(self):
+        engine = TriangleEngine()
+        sides = list(range(-1, 26)) + [199, 200, 201, 2.0, 'a', None]
+        triples = list(itertools.product(sides, repeat=3))
+        expected = [classify_triangle(*triple) for triple in triples]
+        self.assertEqual([engine.classify(*triple) for triple in triples], expected)
+        codes = engine.classify_codes([list(triple) for triple in triples])
+        self.assertEqual([engine.labels[code] for code in codes], expected)
+
+    @unittest.skipUnless(os.path.exists(HW01_PATH), 'hw-01 is not checked out')
+    def testMatchesHw01(self):
+        hw01 = load_hw01()
+        engine = TriangleEngine(**HW01)
+        sides = [1, 2, 3, 4, 5, 6, 8, 10, 13, 0.5, 1.5, 2.5, 3.0, 4.0, 5.0, 0, -1, -2.5, 'a', None]
+        triples = list(itertools.product(sides, repeat=3))
+        expected = [hw01.classify_triangle(*triple) for triple in triples]
+        self.assertEqual([engine.classify(*triple) for triple in triples], expected)
+        codes = engine.classify_codes([list(triple) for triple in triples])
+        self.assertEqual([engine.labels[code] for code in codes], expected)
+        numeric = [triple for triple in triples if not any(isinstance(side, (str, type(None))) for side in triple)]
+        codes = engine.classify_codes([[float(side) for side in triple] for triple in numeric])
+        self.assertEqual([engine.labels[code] for code in codes], [hw01.classify_triangle(*triple) for triple in numeric])
+
+    @unittest.skipIf(triangle_engine.np is None, 'NumPy is not installed')
+    def testArraysMatchScalar(self):
+        np = triangle_engine.np
+        for engine in (TriangleEngine(), TriangleEngine(**HW01), TriangleEngine(False, 50, 1e-6)):
+            triples = np.indices((30, 30, 30)).reshape(3, -1).T - 2
+            codes = engine.classify_codes(triples[:, 0], triples[:, 1], triples[:, 2])
+            self.assertEqual(codes.tolist(), [engine.classify_code(*triple) for triple in triples.tolist()])
+            halves = triples / 2
+            self.assertEqual(engine.classify_codes(halves).tolist(),
+                             [engine.classify_code(*triple) for triple in halves.tolist()])
+
+    def testFloatSemantics(self):
+        engine = TriangleEngine(**HW01)
+        self.assertEqual(engine.classify(3, 4, 5), 'Scalene Right')
+        self.assertEqual(engine.classify(5, 5, 5), 'Equilateral ')
+        self.assertEqual(engine.classify(1.5, 1.5, 2), 'Isosceles ')
+        self.assertEqual(engine.classify(1, 2, 3), 'Not a triangle')
+        self.assertEqual(engine.classify('a', 4, 5), 'Invalid input')
+        self.assertEqual(engine.classify(1, 1, 2 ** 0.5), 'Isosceles ')
+
+    def testTolerance(self):
+        engine = TriangleEngine(integer=False, max_side=None, tolerance=1e-9)
+        self.assertEqual(engine.classify_code(1, 1, 2 ** 0.5), triangle_engine.ISOSCELES_RIGHT)
+        self.assertEqual(engine.classify(0.33, 0.44, 0.55), 'Right')
+        self.assertEqual(TriangleEngine(integer=False, max_side=None).classify(0.33, 0.44, 0.55), 'Scalene')
+
+    @unittest.skipIf(triangle_engine.np is None, 'NumPy is not installed')
+    def testToleranceBoundaryMatchesScalar(self):
+        np = triangle_engine.np
+        engine = TriangleEngine(False, None, 0.01, 'descriptive')
+        self.assertEqual(engine.classify(3, 4, 24.751 ** 0.5), 'Scalene Right')
+        # Hypotenuses just inside and outside the tolerance, measured against either side
+        hypotenuses = [(25 * scale) ** 0.5 for scale in (0.98, 0.9901, 0.99, 0.9899, 1.0101, 1.0102, 1.02)]
+        triples = [(3.0, 4.0, c) for c in hypotenuses] + [(3.0, 4.0, 24.751 ** 0.5), (2.0, 2.0, 2.0 ** 1.5),
+                                                          (1.0, 1.0, 1.0099), (1.0, 1.0101, 1.02)]
+        rng = np.random.default_rng(5)
+        triples += (rng.uniform(1, 2, (2000, 3)) * [1.0, 1.0, 1.4]).tolist()
+        for tolerance in (0.01, 0.05):
+            engine = TriangleEngine(False, None, tolerance)
+            self.assertEqual(engine.classify_codes(np.array(triples)).tolist(),
+                             [engine.classify_code(*triple) for triple in triples])
+        lines = ['%r,%r,%r' % triple for triple in triples[:11]]
+        engine = TriangleEngine(False, None, 0.01, 'descriptive')
+        self.assertEqual([engine.labels[code] for code in engine.classify_lines(lines)],
+                         [engine.classify(*triple) for triple in triples[:11]])
+
+    def testBadSettings(self):
+        with self.assertRaises(ValueError):
+            TriangleEngine(max_side=None)
+        with self.assertRaises(ValueError):
+            TriangleEngine(labels='shouting')
+
+
+class TestClassifyFile(unittest.TestCase):
+    # Streaming CSV classification
+
+    def setUp(self):
+        self.lines = ['%d,%d,%d' % triple for triple in itertools.product(range(0, 12), repeat=3)]
+        self.lines += ['3.0,4,5', 'a,b,c', '1,2', '']
+
+    def expected(self):
+        engine = TriangleEngine()
+        return ''.join(f'{line},{engine.labels[code].strip()}\n'
+                       for line, code in zip(self.lines, engine.classify_lines(self.lines)))
+
+    def testInProcess(self):
+        output = io.StringIO()
+        report = classify_file(io.StringIO('\n'.join(self.lines) + '\n'), output, workers=1, chunk_size=100)
+        self.assertEqual(output.getvalue(), self.expected())
+        self.assertEqual(report['total'], len(self.lines))
+        self.assertEqual(report['counts']['InvalidInput'], 12 ** 3 - 11 ** 3 + 4)
+        self.assertEqual(output.getvalue().splitlines()[-4:],
+                         ['3.0,4,5,InvalidInput', 'a,b,c,InvalidInput', '1,2,InvalidInput', ',InvalidInput'])
+
+    def testWorkerPoolKeepsOrder(self):
+        output = io.StringIO()
+        report = classify_file(io.StringIO('\r\n'.join(self.lines) + '\r\n'), output, workers=2, chunk_size=97)
+        self.assertEqual(output.getvalue(), self.expected())
+        self.assertEqual(sum(report['counts'].values()), len(self.lines))
+
+    def testMainReportsCounts(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, 'sides.csv')
+            target = os.path.join(directory, 'labels.csv')
+            with open(source, 'w', encoding='ascii') as file:
+                file.write('3,4,5\n1.5,1.5,1.5\n1,1,3\n')
+            log = io.StringIO()
+            with patch('sys.stdout', log):
+                self.assertEqual(main([source, '--output', target, '--float', '--labels', 'descriptive',
+                                       '--workers', '1']), 0)
+            with open(target, encoding='ascii') as file:
+                self.assertEqual(file.read().splitlines(),
+                                 ['3,4,5,Scalene Right', '1.5,1.5,1.5,Equilateral', '1,1,3,Not a triangle'])
+        self.assertIn('Scalene Right: 1', log.getvalue())
+        self.assertIn('Equilateral: 1', log.getvalue())
+        self.assertIn('3 triples in', log.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
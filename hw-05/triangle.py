@@ -2,10 +2,48 @@
 """
 Module for classifying triangles based on side lengths.
 
+Classification is done by triangle_engine.TriangleEngine, whose category
+codes and labels are shared by both classifiers here; a precomputed lookup
+table of those codes is their fast path for valid integer sides.
+
 Functions:
     classify_triangle(a, b, c): Classifies a triangle based on side lengths.
+    classify_triangles(a, b, c): Classifies arrays of triangles at once (needs NumPy).
+    build_table(path): Precomputes every answer into a lookup table file.
+    load_table(path): Memory-maps a lookup table used by both classifiers.
+
+Run ``python triangle.py`` to build the lookup table next to this module.
 """
 
+import os
+import mmap
+
+from triangle_engine import INVALID_INPUT, LABEL_STYLES, TriangleEngine, np
+
+# Label of each triangle_engine category code returned by classify_triangles
+LABELS = LABEL_STYLES['compact']
+
+# Largest valid side length
+MAX_SIDE = 200
+
+# Engine behind both classifiers when no lookup table is loaded
+_ENGINE = TriangleEngine(integer=True, max_side=MAX_SIDE)
+
+# The lookup table holds one code per sorted triple low <= middle <= high,
+# at index _HIGH_OFFSETS[high] + _MIDDLE_OFFSETS[middle] + low - 1
+# (the combinatorial number system for the strictly increasing
+# low - 1 < middle < high + 1), which is C(202, 3) bytes, followed by a
+# TABLE_VERSION byte so tables built with other category codes are rejected.
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'triangle_table.bin')
+TABLE_SIZE = (MAX_SIDE + 2) * (MAX_SIDE + 1) * MAX_SIDE // 6
+TABLE_VERSION = 2
+_HIGH_OFFSETS = [(side + 1) * side * (side - 1) // 6 for side in range(MAX_SIDE + 1)]
+_MIDDLE_OFFSETS = [side * (side - 1) // 2 for side in range(MAX_SIDE + 1)]
+
+# Memory-mapped lookup table, or None to compute every answer
+_TABLE = None
+_TABLE_ARRAY = None
+
 def classify_triangle(a, b, c):
     """
     This function returns a string with the type of triangle from three integer values
@@ -20,21 +58,123 @@ def classify_triangle(a, b, c):
         str: Type of triangle: 'Equilateral', 'Isosceles', 'Scalene', 'Right', or 'NotATriangle'.
         Returns 'InvalidInput' if inputs are invalid.
     """
+    if _TABLE is None:
+        return _ENGINE.classify(a, b, c)
+
     # Verify inputs are integers and within the valid range
-    if not all(isinstance(x, int) and 0 < x <= 200 for x in (a, b, c)):
+    if not (isinstance(a, int) and isinstance(b, int) and isinstance(c, int)
+            and 0 < a <= 200 and 0 < b <= 200 and 0 < c <= 200):
         return 'InvalidInput'
+    return LABELS[_TABLE[_table_index(a, b, c)]]
+
+
+def _valid_sides(sides):
+    """
+    Return a mask of the sides that are integers in 1..200, matching the
+    checks of classify_triangle, and the sides as int32 (invalid ones as 1).
+    """
+    if sides.dtype.kind == 'O':
+        valid = np.frompyfunc(lambda x: isinstance(x, int) and 0 < x <= 200, 1, 1)(sides).astype(bool)
+    elif sides.dtype.kind in 'biu':
+        valid = (sides > 0) & (sides <= 200)
+    else:
+        # Float sides are invalid, as they are for classify_triangle
+        return np.zeros(sides.shape, dtype=bool), np.ones(sides.shape, dtype=np.int32)
+    return valid, np.where(valid, sides, 1).astype(np.int32)
+
+def classify_triangles(a, b=None, c=None):
+    """
+    Vectorized classify_triangle. Takes three arrays of side lengths (which
+    are broadcast together) or a single N x 3 array of side triples.
+
+    Returns:
+        numpy.ndarray: uint8 category codes, one per triple; LABELS[code] is
+        the label classify_triangle returns for the same sides.
+    """
+    if np is None:
+        raise ImportError('NumPy is required for classify_triangles.')
+    if b is None and c is None:
+        sides = np.asarray(a)
+        a, b, c = sides[..., 0], sides[..., 1], sides[..., 2]
+    if _TABLE_ARRAY is None:
+        return _ENGINE.classify_codes(a, b, c)
+
+    a, b, c = np.broadcast_arrays(np.asarray(a), np.asarray(b), np.asarray(c))
+    valid_a, a = _valid_sides(a)
+    valid_b, b = _valid_sides(b)
+    valid_c, c = _valid_sides(c)
+
+    # Sort the sides into a table index
+    low = np.minimum(np.minimum(a, b), c)
+    high = np.maximum(np.maximum(a, b), c)
+    middle = a + b + c - low - high
+    codes = _TABLE_ARRAY[_HIGH_OFFSETS_ARRAY[high] + _MIDDLE_OFFSETS_ARRAY[middle] + low - 1]
+    codes[~(valid_a & valid_b & valid_c)] = INVALID_INPUT
+    return codes
+
+
+def _table_index(a, b, c):
+    """
+    Return the lookup table index of valid sides a, b and c.
+    """
+    if a > b:
+        a, b = b, a
+    if b > c:
+        b, c = c, b
+        if a > b:
+            a, b = b, a
+    return _HIGH_OFFSETS[c] + _MIDDLE_OFFSETS[b] + a - 1
+
+def build_table(path=TABLE_PATH):
+    """
+    Classify every sorted triple of valid sides once with the engine and
+    write the category codes to path, one byte each.
+    """
+    table = bytearray(TABLE_SIZE + 1)
+    for high in range(1, MAX_SIDE + 1):
+        start = _HIGH_OFFSETS[high]
+        if np is not None:
+            # Row-major lower-triangle indices are the (middle, low) pairs in table order
+            middle, low = np.tril_indices(high)
+            codes = _ENGINE.classify_codes(low + 1, middle + 1, high)
+            table[start:start + len(codes)] = codes.tobytes()
+            continue
+        for middle in range(1, high + 1):
+            for low in range(1, middle + 1):
+                table[start + _MIDDLE_OFFSETS[middle] + low - 1] = _ENGINE.classify_code(low, middle, high)
+    table[TABLE_SIZE] = TABLE_VERSION
+    with open(path, 'wb') as file:
+        file.write(table)
+
+def load_table(path=TABLE_PATH):
+    """
+    Memory-map the lookup table at path for classify_triangle and
+    classify_triangles. A missing, malformed or outdated table leaves both
+    computing their answers. Returns True if the table was loaded.
+    """
+    global _TABLE, _TABLE_ARRAY  # pylint: disable=global-statement
+    _TABLE = _TABLE_ARRAY = None
+    try:
+        with open(path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size != TABLE_SIZE + 1:
+                return False
+            table = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except OSError:
+        return False
+    if table[TABLE_SIZE] != TABLE_VERSION:
+        table.close()
+        return False
+    _TABLE = table
+    if np is not None:
+        _TABLE_ARRAY = np.frombuffer(_TABLE, dtype=np.uint8, count=TABLE_SIZE)
+    return True
+
+if np is not None:
+    _HIGH_OFFSETS_ARRAY = np.array(_HIGH_OFFSETS, dtype=np.int32)
+    _MIDDLE_OFFSETS_ARRAY = np.array(_MIDDLE_OFFSETS, dtype=np.int32)
+
+load_table()
 
-    # Check if it's a valid triangle
-    if (a >= b + c) or (b >= a + c) or (c >= a + b):
-        return 'NotATriangle'
-
-    # Check for right triangle
-    sides = sorted([a, b, c])
-    if (sides[0] ** 2 + sides[1] ** 2) == (sides[2] ** 2):
-        return 'Right'
-    # Determine triangle type
-    if a == b == c:
-        return 'Equilateral'
-    if a == b or b == c or a == c:
-        return 'Isosceles'
-    return 'Scalene'
+if __name__ == '__main__':
+    build_table()
+    print(f'Wrote {TABLE_SIZE} triangle classifications to {TABLE_PATH}')
@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""
+Triangle classification engine shared by the triangle assignments.
+
+The assignments disagree on what they accept and what they return:
+hw-02a and hw-05 take integers in 1..200 and return labels such as 'Right',
+while hw-01 takes any positive number and returns labels such as
+'Scalene Right'. TriangleEngine covers both through its settings.
+
+Classes:
+    TriangleEngine: Classifies side triples one at a time or in arrays.
+
+Functions:
+    classify_file(source, output, engine, workers, chunk_size): Classifies a CSV stream.
+    main(argv): Command-line entry point.
+
+Usage:
+    python triangle_engine.py sides.csv --output labels.csv --workers 4
+"""
+
+import os
+import sys
+import math
+import time
+import argparse
+import itertools
+import collections
+import concurrent.futures
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+# Category codes; a right triangle is also isosceles or scalene
+INVALID_INPUT, NOT_A_TRIANGLE, EQUILATERAL, ISOSCELES, SCALENE, ISOSCELES_RIGHT, SCALENE_RIGHT = range(7)
+
+# Label for each category code, per label style
+LABEL_STYLES = {
+    # hw-02a and hw-05
+    'compact': ('InvalidInput', 'NotATriangle', 'Equilateral', 'Isosceles', 'Scalene', 'Right', 'Right'),
+    # hw-01
+    'descriptive': ('Invalid input', 'Not a triangle', 'Equilateral ', 'Isosceles ', 'Scalene ',
+                    'Isosceles Right', 'Scalene Right'),
+}
+
+
+class TriangleEngine:
+    """
+    Triangle classifier with configurable semantics.
+
+    Args:
+        integer (bool): Only accept integers (as hw-02a and hw-05 do);
+            otherwise any positive int or float is accepted (as in hw-01).
+        max_side (int or float): Largest accepted side, or None for no limit.
+            Required in integer mode.
+        tolerance (float): Relative tolerance for the right-angle and
+            equal-side tests in float mode; 0 compares exactly.
+        labels (str): Label style, a key of LABEL_STYLES.
+    """
+
+    def __init__(self, integer=True, max_side=200, tolerance=0.0, labels='compact'):
+        if integer and max_side is None:
+            raise ValueError('Integer mode needs a max_side.')
+        if labels not in LABEL_STYLES:
+            raise ValueError(f'Unknown label style {labels!r}.')
+        self.integer = integer
+        self.max_side = max_side
+        self.tolerance = 0.0 if integer else tolerance
+        self.labels = LABEL_STYLES[labels]
+        self.settings = {'integer': integer, 'max_side': max_side, 'tolerance': tolerance, 'labels': labels}
+
+    def _valid(self, side):
+        if self.integer:
+            return isinstance(side, int) and 0 < side <= self.max_side
+        return (isinstance(side, (int, float)) and side > 0
+                and (self.max_side is None or side <= self.max_side))
+
+    def _equal(self, first, second):
+        if self.tolerance:
+            return math.isclose(first, second, rel_tol=self.tolerance)
+        return first == second
+
+    def classify_code(self, a, b, c):
+        """
+        Return the category code of one side triple.
+        """
+        if not (self._valid(a) and self._valid(b) and self._valid(c)):
+            return INVALID_INPUT
+        low, middle, high = sorted((a, b, c))
+        if low + middle <= high:
+            return NOT_A_TRIANGLE
+        if self._equal(low, high):
+            return EQUILATERAL
+        right = self._equal(low * low + middle * middle, high * high)
+        if self._equal(low, middle) or self._equal(middle, high):
+            return ISOSCELES_RIGHT if right else ISOSCELES
+        return SCALENE_RIGHT if right else SCALENE
+
+    def classify(self, a, b, c):
+        """
+        Return the label of one side triple.
+        """
+        return self.labels[self.classify_code(a, b, c)]
+
+    def _valid_array(self, sides):
+        """
+        Return a mask of the valid sides and the sides with invalid ones
+        replaced by 1, or None when the dtype needs per-element checks.
+        """
+        kinds = 'biu' if self.integer else 'biuf'
+        if sides.dtype.kind not in kinds:
+            if sides.dtype.kind == 'O':
+                return None
+            return np.zeros(sides.shape, dtype=bool), np.ones(sides.shape, dtype=np.int64)
+        valid = sides > 0
+        if self.max_side is not None:
+            valid &= sides <= self.max_side
+        return valid, np.where(valid, sides, 1).astype(np.int64 if self.integer else np.float64)
+
+    def classify_codes(self, a, b=None, c=None):
+        """
+        Return the uint8 category codes of three broadcastable side arrays,
+        or of a single N x 3 array of triples. Without NumPy a list of codes
+        is returned.
+        """
+        if b is None and c is None:
+            a, b, c = zip(*a) if np is None else np.moveaxis(np.asarray(a), -1, 0)
+        if np is None:
+            return [self.classify_code(*triple) for triple in zip(a, b, c)]
+        a, b, c = np.broadcast_arrays(np.asarray(a), np.asarray(b), np.asarray(c))
+        checked = [self._valid_array(side) for side in (a, b, c)]
+        if None in checked:
+            return np.frompyfunc(self.classify_code, 3, 1)(a, b, c).astype(np.uint8)
+        (valid_a, a), (valid_b, b), (valid_c, c) = checked
+
+        low = np.minimum(np.minimum(a, b), c)
+        high = np.maximum(np.maximum(a, b), c)
+        middle = np.maximum(np.minimum(a, b), np.minimum(np.maximum(a, b), c))
+        if self.tolerance:
+            tolerance = self.tolerance
+
+            def equal(first, second):
+                # math.isclose's rule, relative to the larger magnitude (np.isclose uses second only)
+                with np.errstate(invalid='ignore'):
+                    return (first == second) | (np.abs(first - second)
+                                                <= tolerance * np.maximum(np.abs(first), np.abs(second)))
+        else:
+            equal = np.equal
+        right = equal(low * low + middle * middle, high * high)
+
+        codes = np.where(right, SCALENE_RIGHT, SCALENE).astype(np.uint8)
+        codes[(equal(low, middle) | equal(middle, high)) & right] = ISOSCELES_RIGHT
+        codes[(equal(low, middle) | equal(middle, high)) & ~right] = ISOSCELES
+        codes[equal(low, high)] = EQUILATERAL
+        codes[low + middle <= high] = NOT_A_TRIANGLE
+        codes[~(valid_a & valid_b & valid_c)] = INVALID_INPUT
+        return codes
+
+    def parse_side(self, text):
+        """
+        Parse one CSV field into a side length; unparsable fields are None.
+        """
+        try:
+            return int(text) if self.integer else float(text)
+        except ValueError:
+            return None
+
+    def classify_lines(self, lines):
+        """
+        Classify CSV lines of three sides each, returning the category codes.
+        Lines without exactly three fields are invalid input.
+        """
+        columns = ([], [], [])
+        parse = self.parse_side
+        for line in lines:
+            fields = line.split(',')
+            if len(fields) != 3:
+                fields = ('', '', '')
+            for column, field in zip(columns, fields):
+                column.append(parse(field))
+        if np is None or not lines:
+            return [self.classify_code(*triple) for triple in zip(*columns)]
+        if self.integer:
+            # Anything that is not an in-range integer is invalid either way
+            limit = self.max_side
+            arrays = [np.array([side if isinstance(side, int) and 0 < side <= limit else 0 for side in column],
+                               dtype=np.int64) for column in columns]
+        else:
+            arrays = [np.array([0.0 if side is None else side for side in column]) for column in columns]
+        return self.classify_codes(*arrays)
+
+
+# Engine used by worker processes, set up by _init_worker
+_WORKER_ENGINE = None
+
+
+def _init_worker(settings):
+    global _WORKER_ENGINE  # pylint: disable=global-statement
+    _WORKER_ENGINE = TriangleEngine(**settings)
+
+
+def _classify_chunk(lines, engine=None):
+    """
+    Classify a chunk of CSV lines, returning the output text and the number
+    of triples per category code.
+    """
+    engine = engine or _WORKER_ENGINE
+    codes = engine.classify_lines(lines)
+    # hw-01's labels end in a space when not right-angled; keep it out of the CSV
+    labels = [label.strip() for label in engine.labels]
+    text = ''.join(f'{line},{labels[code]}\n' for line, code in zip(lines, codes))
+    counts = [0] * len(labels)
+    for code in codes:
+        counts[code] += 1
+    return text, counts
+
+
+def classify_file(source, output, engine=None, workers=None, chunk_size=100000):
+    """
+    Stream CSV lines of side triples from source, append each line's label
+    (without surrounding spaces) and write the lines to output in input order. Chunks of chunk_size lines
+    are classified in a pool of worker processes (in this process when
+    workers is 1), with a bounded number of chunks in flight.
+
+    Returns:
+        dict: Number of triples per label and in total.
+    """
+    engine = engine or TriangleEngine()
+    lines = (line.rstrip('\r\n') for line in source)
+    chunks = iter(lambda: list(itertools.islice(lines, chunk_size)), [])
+    totals = [0] * len(engine.labels)
+
+    def write(text, counts):
+        output.write(text)
+        for code, count in enumerate(counts):
+            totals[code] += count
+
+    if workers == 1:
+        for chunk in chunks:
+            write(*_classify_chunk(chunk, engine))
+    else:
+        workers = workers or os.cpu_count() or 1
+        with concurrent.futures.ProcessPoolExecutor(workers, initializer=_init_worker,
+                                                    initargs=(engine.settings,)) as executor:
+            pending = collections.deque()
+            window = 2 * workers
+            for chunk in chunks:
+                pending.append(executor.submit(_classify_chunk, chunk))
+                if len(pending) >= window:
+                    write(*pending.popleft().result())
+            while pending:
+                write(*pending.popleft().result())
+
+    counts = collections.Counter()
+    for code, count in enumerate(totals):
+        if count:
+            counts[engine.labels[code].strip()] += count
+    return {'counts': dict(counts), 'total': sum(totals)}
+
+
+def main(argv=None):
+    """
+    Command-line entry point: python triangle_engine.py INPUT [--output FILE]
+    """
+    parser = argparse.ArgumentParser(description='Classify a CSV file of triangle side triples.')
+    parser.add_argument('input', help='CSV file with one a,b,c triple per line, or - for stdin')
+    parser.add_argument('--output', help='write labelled lines here instead of stdout')
+    parser.add_argument('--float', action='store_true', help='accept float sides (hw-01 semantics)')
+    parser.add_argument('--max-side', type=float, help='largest accepted side (default 200 for integers)')
+    parser.add_argument('--tolerance', type=float, default=0.0, help='relative tolerance in float mode')
+    parser.add_argument('--labels', choices=sorted(LABEL_STYLES), default='compact')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (1 classifies in-process)')
+    parser.add_argument('--chunk-size', type=int, default=100000, help='lines per chunk')
+    args = parser.parse_args(argv)
+
+    max_side = args.max_side
+    if not args.float:
+        max_side = 200 if max_side is None else int(max_side)
+    engine = TriangleEngine(not args.float, max_side, args.tolerance, args.labels)
+    source = sys.stdin if args.input == '-' else open(args.input, encoding='ascii', errors='replace')
+    output = sys.stdout if args.output is None else open(args.output, 'w', encoding='ascii')
+    start = time.perf_counter()
+    try:
+        report = classify_file(source, output, engine, args.workers, args.chunk_size)
+    finally:
+        for file in (source, output):
+            if file not in (sys.stdin, sys.stdout):
+                file.close()
+    elapsed = time.perf_counter() - start
+
+    log = sys.stderr if args.output is None else sys.stdout
+    for label, count in sorted(report['counts'].items()):
+        print(f'{label:>16}: {count}', file=log)
+    rate = report['total'] / elapsed if elapsed else 0.0
+    print(f'{report["total"]} triples in {elapsed:.2f}s ({rate:,.0f} triples/s)', file=log)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())